@@ -0,0 +1,36 @@
+from vendor_management_system.query_params import parse_datetime_param
+
+
+def filter_purchase_orders(queryset, query_params):
+    """
+    Apply the purchase order filters shared by the list and export views.
+
+    Parameters:
+    - vendor (str): Optional. Vendor code of the purchase orders.
+    - status (str): Optional. Status of the purchase orders.
+    - from (date/datetime): Optional. Only orders issued at or after this time.
+    - to (date/datetime): Optional. Only orders issued before this time.
+
+    Raises:
+    - ValidationError: A date filter could not be parsed.
+    """
+    vendor_id = query_params.get('vendor')
+    if vendor_id:
+        queryset = queryset.filter(vendor=vendor_id)
+
+    order_status = query_params.get('status')
+    if order_status:
+        queryset = queryset.filter(status=order_status)
+
+    issued_from = query_params.get('from')
+    if issued_from:
+        queryset = queryset.filter(
+            issue_date__gte=parse_datetime_param(issued_from, 'from')
+        )
+
+    issued_to = query_params.get('to')
+    if issued_to:
+        queryset = queryset.filter(
+            issue_date__lt=parse_datetime_param(issued_to, 'to')
+        )
+    return queryset
@@ -0,0 +1,120 @@
+import json
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from vendor.models import VendorModel
+from purchase_order.utils.benchmark import MAX_PREFIX_LENGTH, run_benchmark
+
+
+class Command(BaseCommand):
+    """
+    Load test every vendor and purchase order endpoint.
+    """
+    help = (
+        "Send concurrent requests to every endpoint of the vendor and "
+        "purchase order APIs, through the test client or to a running "
+        "server, and print the throughput, latency percentiles and query "
+        "counts of each endpoint as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--username',
+            required=True,
+            help="User whose access token authenticates the requests."
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=200,
+            help="Number of requests sent to each endpoint."
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=1,
+            help="Number of requests in flight at once."
+        )
+        parser.add_argument(
+            '--url',
+            help=(
+                "Base URL of a running server using the same database, "
+                "e.g. http://127.0.0.1:8000. Defaults to the in-process "
+                "test client, which also counts queries."
+            )
+        )
+        parser.add_argument(
+            '--endpoint',
+            action='append',
+            help=(
+                "Only benchmark the endpoints whose route contains this "
+                "string. Can be repeated."
+            )
+        )
+        parser.add_argument(
+            '--page-size',
+            type=int,
+            default=100,
+            help="page_size of the purchase order list requests."
+        )
+        parser.add_argument(
+            '--prefix',
+            default='BN',
+            help=(
+                "Prefix of the throwaway vendors and purchase orders the "
+                f"write endpoints use, at most {MAX_PREFIX_LENGTH} characters."
+            )
+        )
+        parser.add_argument(
+            '--output',
+            help="File to write the JSON report to instead of stdout."
+        )
+
+    def handle(self, *args, **options):
+        if not 0 < options['requests'] < 10 ** 5:
+            raise CommandError("--requests must be between 1 and 99999.")
+        if options['concurrency'] < 1:
+            raise CommandError("--concurrency must be at least 1.")
+        prefix = options['prefix']
+        if not 0 < len(prefix) <= MAX_PREFIX_LENGTH:
+            raise CommandError(
+                f"--prefix must be 1 to {MAX_PREFIX_LENGTH} characters."
+            )
+        if VendorModel.objects.filter(vendor_code__startswith=prefix).exists():
+            raise CommandError(
+                f"Vendors with the prefix {prefix} already exist."
+            )
+        try:
+            user = get_user_model().objects.get(username=options['username'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"User {options['username']} does not exist.")
+
+        # The in-process client always sends Host: testserver.
+        allowed_hosts = [*settings.ALLOWED_HOSTS, 'testserver']
+        with override_settings(ALLOWED_HOSTS=allowed_hosts):
+            report = run_benchmark(
+                str(RefreshToken.for_user(user).access_token),
+                options['requests'],
+                options['concurrency'],
+                prefix=prefix,
+                base_url=options['url'],
+                page_size=options['page_size'],
+                only=options['endpoint']
+            )
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output + '\n')
+            failed = sum(result['failed'] for result in report['results'])
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Benchmarked {len(report['results'])} endpoints "
+                    f"({failed} failed requests), report written to "
+                    f"{options['output']}"
+                )
+            )
+        else:
+            self.stdout.write(output)
@@ -0,0 +1,135 @@
+import asyncio
+import time
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from vendor.models import VendorModel
+from purchase_order.models import PurchaseOrderModel
+from purchase_order.utils.benchmark import percentile
+
+
+class Command(BaseCommand):
+    """
+    Compare the sync read endpoints with their async variants under
+    concurrent load.
+    """
+    help = (
+        "Send the same number of concurrent GET requests to each sync read "
+        "endpoint and to its /api/async/ variant through the ASGI handler, "
+        "and report requests per second, p50 and p99 latency."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--username',
+            required=True,
+            help="User whose access token authenticates the requests."
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=500,
+            help="Number of requests sent to each endpoint."
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=50,
+            help="Number of requests in flight at once."
+        )
+        parser.add_argument(
+            '--page-size',
+            type=int,
+            default=100,
+            help="page_size of the purchase order list requests."
+        )
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['concurrency'] < 1:
+            raise CommandError(
+                "--requests and --concurrency must be at least 1."
+            )
+        try:
+            user = get_user_model().objects.get(username=options['username'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"User {options['username']} does not exist.")
+        vendor_code = VendorModel.objects.values_list(
+            'vendor_code', flat=True
+        ).first()
+        po_number = PurchaseOrderModel.objects.values_list(
+            'po_number', flat=True
+        ).first()
+        if vendor_code is None or po_number is None:
+            raise CommandError(
+                "At least one vendor and one purchase order are needed."
+            )
+
+        paths = [
+            'vendors/',
+            f'vendors/{vendor_code}/',
+            f'vendors/{vendor_code}/performance/',
+            f'purchase_orders/?page_size={options["page_size"]}',
+            f'purchase_orders/{po_number}/'
+        ]
+        client = AsyncClient(raise_request_exception=False)
+        headers = {
+            'authorization': f'Bearer {RefreshToken.for_user(user).access_token}'
+        }
+
+        self.stdout.write(
+            f"{options['requests']} requests per endpoint, "
+            f"{options['concurrency']} concurrent"
+        )
+        self.stdout.write(
+            f"{'endpoint':<48}{'rps':>10}{'p50 ms':>10}{'p99 ms':>10}"
+            f"{'errors':>8}"
+        )
+        # The in-process client always sends Host: testserver.
+        allowed_hosts = [*settings.ALLOWED_HOSTS, 'testserver']
+        with override_settings(ALLOWED_HOSTS=allowed_hosts):
+            for path in paths:
+                for prefix in ('/api/', '/api/async/'):
+                    url = prefix + path
+                    rps, latencies, errors = asyncio.run(
+                        self.load(
+                            client,
+                            url,
+                            headers,
+                            options['requests'],
+                            options['concurrency']
+                        )
+                    )
+                    self.stdout.write(
+                        f"{url:<48}{rps:>10.1f}"
+                        f"{percentile(latencies, 0.50) * 1000:>10.2f}"
+                        f"{percentile(latencies, 0.99) * 1000:>10.2f}"
+                        f"{errors:>8}"
+                    )
+
+    async def load(self, client, url, headers, requests, concurrency):
+        """
+        Send `requests` GET requests to url, `concurrency` at a time.
+
+        Returns:
+        - Requests per second, the sorted latencies in seconds and the
+          number of non-200 responses.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+        errors = 0
+
+        async def fetch():
+            nonlocal errors
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(url, headers=headers)
+                latencies.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(fetch() for _ in range(requests)))
+        elapsed = time.perf_counter() - started
+        return requests / elapsed, sorted(latencies), errors
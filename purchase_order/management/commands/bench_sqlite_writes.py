@@ -0,0 +1,69 @@
+import json
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import override_settings
+from purchase_order.utils.write_benchmark import run_write_benchmark
+
+
+class Command(BaseCommand):
+    """
+    Compare the concurrent write throughput of the SQLite settings.
+    """
+    help = (
+        "Acknowledge and rate purchase orders from concurrent workers, once "
+        "with Django's SQLite defaults and once with the configured "
+        "SQLITE_PRAGMAS and SQLITE_TRANSACTION_MODE, each on a scratch "
+        "database, and print the throughput, latency percentiles and failed "
+        "writes of each as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--orders',
+            type=int,
+            default=200,
+            help="Purchase orders acknowledged, and rated, per profile."
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=8,
+            help="Number of requests in flight at once."
+        )
+        parser.add_argument(
+            '--output',
+            help="File to write the JSON report to instead of stdout."
+        )
+
+    def handle(self, *args, **options):
+        if not 0 < options['orders'] < 10 ** 6:
+            raise CommandError("--orders must be between 1 and 999999.")
+        if options['concurrency'] < 1:
+            raise CommandError("--concurrency must be at least 1.")
+        if connections[DEFAULT_DB_ALIAS].vendor != 'sqlite':
+            raise CommandError("The default database is not an SQLite database.")
+
+        # The in-process client always sends Host: testserver.
+        allowed_hosts = [*settings.ALLOWED_HOSTS, 'testserver']
+        with override_settings(ALLOWED_HOSTS=allowed_hosts):
+            report = run_write_benchmark(
+                options['orders'],
+                options['concurrency']
+            )
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output + '\n')
+            rates = ', '.join(
+                f"{profile['profile']} {profile['writes_per_second']:.1f}"
+                for profile in report['profiles']
+            )
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Successful writes per second: {rates}, report written "
+                    f"to {options['output']}"
+                )
+            )
+        else:
+            self.stdout.write(output)
@@ -0,0 +1,76 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from vendor.models import VendorModel
+from purchase_order.utils.performance_metric_function import (
+    recompute_vendor_metrics
+)
+
+
+class Command(BaseCommand):
+    """
+    Rebuild every vendor's order stats and performance metrics from its
+    purchase orders.
+    """
+    help = (
+        "Rebuild the order stats, then the on-time delivery rate, quality "
+        "rating average, average response time and fulfillment rate of "
+        "vendors from their purchase orders, in chunks of vendors ordered "
+        "by vendor code."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help="Number of vendors recomputed per chunk."
+        )
+        parser.add_argument(
+            '--start',
+            help="First vendor code to recompute (inclusive)."
+        )
+        parser.add_argument(
+            '--end',
+            help="Last vendor code to recompute (inclusive)."
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        if chunk_size < 1:
+            raise CommandError("--chunk-size must be at least 1.")
+
+        vendors = VendorModel.objects.order_by('vendor_code')
+        if options['start']:
+            vendors = vendors.filter(vendor_code__gte=options['start'])
+        if options['end']:
+            vendors = vendors.filter(vendor_code__lte=options['end'])
+
+        started = time.perf_counter()
+        vendor_count = 0
+        updated_count = 0
+        last_vendor_code = None
+        while True:
+            # Walk the vendors by key range rather than OFFSET.
+            chunk = vendors
+            if last_vendor_code is not None:
+                chunk = chunk.filter(vendor_code__gt=last_vendor_code)
+            vendor_codes = list(
+                chunk.values_list('vendor_code', flat=True)[:chunk_size]
+            )
+            if not vendor_codes:
+                break
+            updated_count += recompute_vendor_metrics(vendor_codes)
+            vendor_count += len(vendor_codes)
+            last_vendor_code = vendor_codes[-1]
+            if options['verbosity'] > 1:
+                self.stdout.write(
+                    f"Recomputed vendors {vendor_codes[0]} to {last_vendor_code}"
+                )
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Recomputed metrics of {vendor_count} vendors "
+                f"({updated_count} rows updated) in {elapsed:.2f}s"
+            )
+        )
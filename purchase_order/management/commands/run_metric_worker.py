@@ -0,0 +1,119 @@
+import threading
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from purchase_order.utils.metric_jobs import (
+    metric_jobs_due, metric_queue_stats, run_metric_jobs
+)
+
+
+class Command(BaseCommand):
+    """
+    Drain the vendor metric job queue.
+    """
+    help = (
+        "Recompute the performance metrics of vendors with pending metric "
+        "jobs. Runs until interrupted, or until the queue is empty with "
+        "--once."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help="Exit once the queue is empty."
+        )
+        parser.add_argument(
+            '--stats',
+            action='store_true',
+            help="Print the queue depth and lag and exit."
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help="Number of worker threads."
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=getattr(settings, 'METRIC_WORKER_BATCH_SIZE', 100),
+            help="Number of jobs claimed per batch."
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=getattr(settings, 'METRIC_WORKER_POLL_INTERVAL', 1.0),
+            help="Seconds to wait when the queue is empty."
+        )
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            self.write_stats()
+            return
+        if options['workers'] < 1 or options['batch_size'] < 1:
+            raise CommandError(
+                "--workers and --batch-size must be at least 1."
+            )
+
+        self.processed = 0
+        self.lock = threading.Lock()
+        started = time.perf_counter()
+        try:
+            if options['workers'] == 1:
+                self.work(options)
+            else:
+                self.run_pool(options)
+        except KeyboardInterrupt:
+            pass
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Ran {self.processed} metric jobs in {elapsed:.2f}s"
+            )
+        )
+
+    def run_pool(self, options):
+        """
+        Run the worker loop in --workers threads, each with its own
+        database connection.
+        """
+        def target():
+            try:
+                self.work(options)
+            finally:
+                connections.close_all()
+
+        workers = [
+            threading.Thread(target=target, daemon=True)
+            for _ in range(options['workers'])
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            while worker.is_alive():
+                worker.join(timeout=options['poll_interval'])
+
+    def work(self, options):
+        """
+        Run batches of jobs until the queue is empty (with --once) or forever.
+        """
+        while True:
+            processed = run_metric_jobs(options['batch_size'])
+            with self.lock:
+                self.processed += processed
+            if processed and options['verbosity'] > 1:
+                self.write_stats()
+            # Jobs claimed by other workers are not due.
+            if not processed and not metric_jobs_due():
+                if options['once']:
+                    return
+                time.sleep(options['poll_interval'])
+
+    def write_stats(self):
+        stats = metric_queue_stats()
+        self.stdout.write(
+            f"Metric queue depth: {stats['depth']}, lag: {stats['lag']:.2f}s"
+        )
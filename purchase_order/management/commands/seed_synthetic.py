@@ -0,0 +1,81 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from vendor.models import VendorModel
+from purchase_order.utils.synthetic import MAX_PREFIX_LENGTH, seed_synthetic
+
+
+class Command(BaseCommand):
+    """
+    Fill the database with synthetic vendors and purchase orders.
+    """
+    help = (
+        "Generate vendors and purchase orders with realistic status, rating "
+        "and acknowledgment distributions using bulk inserts, then rebuild "
+        "the vendors' order stats and performance metrics."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--vendors',
+            type=int,
+            default=1000,
+            help="Number of vendors created."
+        )
+        parser.add_argument(
+            '--orders',
+            type=int,
+            default=100000,
+            help="Number of purchase orders created."
+        )
+        parser.add_argument(
+            '--prefix',
+            default='SYN',
+            help=(
+                "Prefix of the vendor codes and PO numbers, at most "
+                f"{MAX_PREFIX_LENGTH} characters."
+            )
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            help="Seed of the generator, for repeatable data sets."
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help="Rows inserted per query."
+        )
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        if not 0 < len(prefix) <= MAX_PREFIX_LENGTH:
+            raise CommandError(
+                f"--prefix must be 1 to {MAX_PREFIX_LENGTH} characters."
+            )
+        if not 0 < options['vendors'] < 10 ** 6:
+            raise CommandError("--vendors must be between 1 and 999999.")
+        if options['orders'] < 0 or options['batch_size'] < 1:
+            raise CommandError(
+                "--orders must not be negative and --batch-size at least 1."
+            )
+        if VendorModel.objects.filter(vendor_code__startswith=prefix).exists():
+            raise CommandError(
+                f"Vendors with the prefix {prefix} already exist."
+            )
+
+        started = time.perf_counter()
+        seed_synthetic(
+            options['vendors'],
+            options['orders'],
+            prefix=prefix,
+            seed=options['seed'],
+            batch_size=options['batch_size']
+        )
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {options['vendors']} vendors and "
+                f"{options['orders']} purchase orders in {elapsed:.2f}s"
+            )
+        )
@@ -0,0 +1,76 @@
+from django.core.management.base import BaseCommand, CommandError
+from vendor.models import VendorModel
+from purchase_order.utils.metric_stress import (
+    create_stress_orders, run_metric_stress
+)
+
+
+class Command(BaseCommand):
+    """
+    Measure vendor metric updates under concurrent writers.
+    """
+    help = (
+        "Create a throwaway vendor with pending purchase orders, rate and "
+        "acknowledge them from several threads at once, and report the "
+        "throughput and any update lost to a concurrent writer."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=8,
+            help="Number of concurrent writers."
+        )
+        parser.add_argument(
+            '--orders',
+            type=int,
+            default=400,
+            help="Number of purchase orders updated."
+        )
+        parser.add_argument(
+            '--vendor-code',
+            default='STRESS',
+            help="Vendor code of the throwaway vendor."
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            help="Seed of the random ratings and response times."
+        )
+        parser.add_argument(
+            '--keep',
+            action='store_true',
+            help="Keep the vendor and its purchase orders afterwards."
+        )
+
+    def handle(self, *args, **options):
+        if options['threads'] < 1 or options['orders'] < 1:
+            raise CommandError("--threads and --orders must be at least 1.")
+        vendor_code = options['vendor_code']
+        if VendorModel.objects.filter(vendor_code=vendor_code).exists():
+            raise CommandError(f"Vendor {vendor_code} already exists.")
+
+        po_numbers = create_stress_orders(vendor_code, options['orders'])
+        try:
+            result = run_metric_stress(
+                vendor_code,
+                po_numbers,
+                options['threads'],
+                seed=options['seed']
+            )
+        finally:
+            if not options['keep']:
+                VendorModel.objects.filter(vendor_code=vendor_code).delete()
+
+        self.stdout.write(
+            f"{result['updates']} updates from {options['threads']} threads "
+            f"in {result['elapsed']:.2f}s ({result['throughput']:.1f}/s, "
+            f"{result['retries']} retried)"
+        )
+        for error in result['errors']:
+            self.stderr.write(error)
+        lost = result['lost_stats'] + result['lost_metrics']
+        if lost or result['errors']:
+            raise CommandError(f"Lost updates: {', '.join(lost) or 'none'}")
+        self.stdout.write(self.style.SUCCESS("No lost updates"))
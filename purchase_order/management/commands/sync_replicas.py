@@ -0,0 +1,49 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    """
+    Copy the SQLite primary database into the SQLite replica databases.
+    """
+    help = (
+        "Refresh local stand-in replicas: copy the default SQLite database "
+        "into each alias of DATABASE_REPLICAS with SQLite's online backup, "
+        "which does not block writers for the whole copy."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'aliases',
+            nargs='*',
+            help="Replica aliases to refresh, all of DATABASE_REPLICAS by default."
+        )
+
+    def handle(self, *args, **options):
+        aliases = options['aliases'] or getattr(settings, 'DATABASE_REPLICAS', [])
+        if not aliases:
+            raise CommandError("No replica aliases given or configured.")
+        for alias in [DEFAULT_DB_ALIAS, *aliases]:
+            if alias not in settings.DATABASES:
+                raise CommandError(f"Unknown database alias {alias}.")
+            if connections[alias].vendor != 'sqlite':
+                raise CommandError(f"Database {alias} is not an SQLite database.")
+
+        started = time.perf_counter()
+        source = connections[DEFAULT_DB_ALIAS]
+        source.ensure_connection()
+        for alias in aliases:
+            target = connections[alias]
+            target.ensure_connection()
+            source.connection.backup(target.connection)
+            # Drop what the connection read from the replaced file.
+            target.close()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Copied the primary database to {len(aliases)} replicas "
+                f"in {elapsed:.2f}s"
+            )
+        )
@@ -0,0 +1,22 @@
+# Generated by Django 5.0.6 on 2026-10-17 22:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('purchase_order', '0005_alter_purchaseordermodel_acknowledgment_date_and_more'),
+        ('vendor', '0006_rename_fullfillment_rate_historicalperformancemodel_fulfillment_rate_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='purchaseordermodel',
+            index=models.Index(fields=['issue_date', 'po_number'], name='po_issue_date_po_number_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaseordermodel',
+            index=models.Index(fields=['vendor', 'issue_date', 'po_number'], name='po_vendor_issue_date_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-17 22:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('purchase_order', '0006_purchaseordermodel_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='purchaseordermodel',
+            name='expected_delivery_date',
+            field=models.DateTimeField(blank=True, help_text='Delivery date expected before the order was completed.', null=True),
+        ),
+    ]
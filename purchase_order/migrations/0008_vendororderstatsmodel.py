@@ -0,0 +1,28 @@
+# Generated by Django 5.0.6 on 2026-10-17 22:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('purchase_order', '0007_purchaseordermodel_expected_delivery_date'),
+        ('vendor', '0006_rename_fullfillment_rate_historicalperformancemodel_fulfillment_rate_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VendorOrderStatsModel',
+            fields=[
+                ('vendor', models.OneToOneField(help_text='Vendor the counts belong to.', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='order_stats', serialize=False, to='vendor.vendormodel')),
+                ('total_count', models.PositiveIntegerField(default=0, help_text='Number of purchase orders of the vendor.')),
+                ('completed_count', models.PositiveIntegerField(default=0, help_text='Number of completed purchase orders.')),
+                ('on_time_count', models.PositiveIntegerField(default=0, help_text='Number of completed purchase orders delivered on time.')),
+                ('rated_count', models.PositiveIntegerField(default=0, help_text='Number of purchase orders with a quality rating.')),
+                ('acknowledged_count', models.PositiveIntegerField(default=0, help_text='Number of acknowledged purchase orders.')),
+                ('quality_rating_sum', models.FloatField(default=0.0, help_text='Sum of the quality ratings.')),
+                ('response_time_sum', models.FloatField(default=0.0, help_text='Sum of the response times in hours.')),
+            ],
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.0.6 on 2026-10-17 22:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('purchase_order', '0008_vendororderstatsmodel'),
+        ('vendor', '0006_rename_fullfillment_rate_historicalperformancemodel_fulfillment_rate_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='purchaseordermodel',
+            name='vendor',
+            field=models.ForeignKey(db_index=False, help_text='Related vendor for the purchase order.', on_delete=django.db.models.deletion.CASCADE, to='vendor.vendormodel'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaseordermodel',
+            index=models.Index(fields=['status', 'issue_date', 'po_number'], name='po_status_issue_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaseordermodel',
+            index=models.Index(fields=['vendor', 'status', 'issue_date'], name='po_vendor_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaseordermodel',
+            index=models.Index(condition=models.Q(('quality_rating__isnull', False)), fields=['vendor', 'quality_rating'], name='po_vendor_rated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaseordermodel',
+            index=models.Index(condition=models.Q(('acknowledgment_date__isnull', False)), fields=['vendor', 'acknowledgment_date'], name='po_vendor_acknowledged_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaseordermodel',
+            index=models.Index(condition=models.Q(('acknowledgment_date__isnull', False)), fields=['acknowledgment_date'], name='po_acknowledged_idx'),
+        ),
+    ]
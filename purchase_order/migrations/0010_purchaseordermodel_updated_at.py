@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-17 22:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('purchase_order', '0009_purchaseordermodel_index_suite'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='purchaseordermodel',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, help_text='Last time the purchase order was saved.'),
+        ),
+    ]
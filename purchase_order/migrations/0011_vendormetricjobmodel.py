@@ -0,0 +1,29 @@
+# Generated by Django 5.0.6 on 2026-10-17 22:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('purchase_order', '0010_purchaseordermodel_updated_at'),
+        ('vendor', '0007_vendormodel_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VendorMetricJobModel',
+            fields=[
+                ('vendor', models.OneToOneField(help_text='Vendor whose metrics are to be recomputed.', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='metric_job', serialize=False, to='vendor.vendormodel')),
+                ('enqueued_at', models.DateTimeField(help_text='Time of the oldest request coalesced into the job.')),
+                ('requested_at', models.DateTimeField(help_text='Time of the latest request coalesced into the job.')),
+                ('available_at', models.DateTimeField(help_text='The job is not run before this time.')),
+                ('attempts', models.PositiveIntegerField(default=0, help_text='Number of failed attempts to run the job.')),
+                ('last_error', models.TextField(blank=True, default='', help_text='Error of the last failed attempt.')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['available_at'], name='metric_job_available_at_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-17 23:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('purchase_order', '0011_vendormetricjobmodel'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vendormetricjobmodel',
+            name='claimed_by',
+            field=models.CharField(blank=True, default='', help_text='Claim of the worker running the job, empty when queued.', max_length=32),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from model_utils import FieldTracker
 from vendor.models import VendorModel
 
 class PurchaseOrderModel(models.Model):
@@ -14,6 +15,8 @@ class PurchaseOrderModel(models.Model):
     vendor = models.ForeignKey(
         VendorModel,
         on_delete=models.CASCADE,
+        # Covered by the composite indexes below, which all lead with vendor.
+        db_index=False,
         help_text="Related vendor for the purchase order."
     )
     order_date = models.DateTimeField(
@@ -22,6 +25,11 @@ class PurchaseOrderModel(models.Model):
     delivery_date = models.DateTimeField(
         help_text="Expected delivery date for the purchase order."
     )
+    expected_delivery_date = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Delivery date expected before the order was completed."
+    )
     items = models.JSONField(
         help_text="Details of the items in the purchase order."
     )
@@ -47,9 +55,166 @@ class PurchaseOrderModel(models.Model):
         blank=True,
         help_text="Date when the purchase order was acknowledged."
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        help_text="Last time the purchase order was saved."
+    )
+    tracker = FieldTracker(
+        fields=[
+            'vendor',
+            'order_date',
+            'delivery_date',
+            'expected_delivery_date',
+            'status',
+            'quality_rating',
+            'acknowledgment_date'
+            ]
+        )
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of the purchase order list and export, with
+            # and without the vendor or status filters. The vendor index also
+            # serves the vendor foreign key and the per-vendor stats rebuild.
+            models.Index(
+                fields=['issue_date', 'po_number'],
+                name='po_issue_date_po_number_idx'
+            ),
+            models.Index(
+                fields=['vendor', 'issue_date', 'po_number'],
+                name='po_vendor_issue_date_idx'
+            ),
+            models.Index(
+                fields=['status', 'issue_date', 'po_number'],
+                name='po_status_issue_date_idx'
+            ),
+            # Completed orders of a vendor, and the list filtered by
+            # both vendor and status.
+            models.Index(
+                fields=['vendor', 'status', 'issue_date'],
+                name='po_vendor_status_idx'
+            ),
+            # Rated and acknowledged orders of a vendor. Partial, so orders
+            # without a rating or acknowledgment cost nothing to index.
+            models.Index(
+                fields=['vendor', 'quality_rating'],
+                condition=models.Q(quality_rating__isnull=False),
+                name='po_vendor_rated_idx'
+            ),
+            models.Index(
+                fields=['vendor', 'acknowledgment_date'],
+                condition=models.Q(acknowledgment_date__isnull=False),
+                name='po_vendor_acknowledged_idx'
+            ),
+            models.Index(
+                fields=['acknowledgment_date'],
+                condition=models.Q(acknowledgment_date__isnull=False),
+                name='po_acknowledged_idx'
+            ),
+        ]
 
     def __str__(self):
         """
         Returns a string representation of the purchase order.
         """
         return self.po_number
+
+
+class VendorOrderStatsModel(models.Model):
+    """
+    Per-vendor counts and sums over the vendor's purchase orders.
+
+    Kept up to date incrementally on every purchase order write so the
+    performance metrics can be derived without counting purchase orders.
+    """
+    vendor = models.OneToOneField(
+        VendorModel,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='order_stats',
+        help_text="Vendor the counts belong to."
+    )
+    total_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of purchase orders of the vendor."
+    )
+    completed_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of completed purchase orders."
+    )
+    on_time_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of completed purchase orders delivered on time."
+    )
+    rated_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of purchase orders with a quality rating."
+    )
+    acknowledged_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of acknowledged purchase orders."
+    )
+    quality_rating_sum = models.FloatField(
+        default=0.0,
+        help_text="Sum of the quality ratings."
+    )
+    response_time_sum = models.FloatField(
+        default=0.0,
+        help_text="Sum of the response times in hours."
+    )
+
+    def __str__(self):
+        return str(self.vendor) + ' | Orders: ' + str(self.total_count)
+
+
+class VendorMetricJobModel(models.Model):
+    """
+    Pending recomputation of a vendor's performance metrics (an outbox).
+
+    Written in the same transaction as the purchase order change that
+    requires it and drained by the run_metric_worker command. A vendor has
+    at most one pending job, so any number of requests made before the job
+    runs are coalesced into a single recomputation.
+    """
+    vendor = models.OneToOneField(
+        VendorModel,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='metric_job',
+        help_text="Vendor whose metrics are to be recomputed."
+    )
+    enqueued_at = models.DateTimeField(
+        help_text="Time of the oldest request coalesced into the job."
+    )
+    requested_at = models.DateTimeField(
+        help_text="Time of the latest request coalesced into the job."
+    )
+    available_at = models.DateTimeField(
+        help_text="The job is not run before this time."
+    )
+    claimed_by = models.CharField(
+        max_length=32,
+        blank=True,
+        default='',
+        help_text="Claim of the worker running the job, empty when queued."
+    )
+    attempts = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of failed attempts to run the job."
+    )
+    last_error = models.TextField(
+        blank=True,
+        default='',
+        help_text="Error of the last failed attempt."
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['available_at'],
+                name='metric_job_available_at_idx'
+            )
+        ]
+
+    def __str__(self):
+        return str(self.vendor) + ' | Enqueued: ' + str(self.enqueued_at)
@@ -0,0 +1,144 @@
+import base64
+import json
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def query_params(request):
+    """
+    Returns the query parameters of a DRF or a plain Django request.
+    """
+    return getattr(request, 'query_params', request.GET)
+
+
+class PurchaseOrderCursorPagination(BasePagination):
+    """
+    Keyset (cursor) pagination for purchase orders.
+
+    Orders are walked on the stable key (issue_date, po_number). Instead of
+    an OFFSET, each page continues strictly after the last key of the
+    previous page, so fetching a deep page costs the same as the first one
+    as long as the key is indexed.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    ordering = ('issue_date', 'po_number')
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_page_size(self, request):
+        """
+        Returns the requested page size, capped by
+        PURCHASE_ORDER_MAX_PAGE_SIZE.
+        """
+        page_size = getattr(settings, 'PURCHASE_ORDER_PAGE_SIZE', 100)
+        max_page_size = getattr(settings, 'PURCHASE_ORDER_MAX_PAGE_SIZE', 1000)
+        try:
+            requested = int(
+                query_params(request)[self.page_size_query_param]
+            )
+            if requested > 0:
+                page_size = requested
+        except (KeyError, ValueError):
+            pass
+        return min(page_size, max_page_size)
+
+    def encode_cursor(self, purchase_order):
+        """
+        Builds an opaque cursor from the ordering key of a purchase order.
+        """
+        position = [
+            purchase_order.issue_date.isoformat(),
+            purchase_order.po_number
+        ]
+        return base64.urlsafe_b64encode(
+            json.dumps(position).encode('utf-8')
+        ).decode('ascii')
+
+    def decode_cursor(self, request):
+        """
+        Returns the (issue_date, po_number) position encoded in the
+        request's cursor, or None when no cursor was given.
+
+        Raises NotFound when the cursor cannot be decoded.
+        """
+        encoded = query_params(request).get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            issue_date, po_number = json.loads(
+                base64.urlsafe_b64decode(encoded.encode('ascii'))
+            )
+            issue_date = parse_datetime(issue_date)
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if issue_date is None or not isinstance(po_number, str):
+            raise NotFound(self.invalid_cursor_message)
+        return issue_date, po_number
+
+    def page_queryset(self, queryset, request):
+        """
+        Returns the query for the page that follows the request's cursor,
+        with one extra row telling whether another page exists.
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        position = self.decode_cursor(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        if position is not None:
+            issue_date, po_number = position
+            # issue_date >= x narrows the index range; the OR only
+            # resolves ties on issue_date within that range.
+            queryset = queryset.filter(
+                Q(issue_date__gt=issue_date) |
+                Q(issue_date=issue_date, po_number__gt=po_number),
+                issue_date__gte=issue_date
+            )
+        return queryset[:self.page_size + 1]
+
+    def finish_page(self, rows):
+        """
+        Trims the extra row fetched by page_queryset and sets the next cursor.
+        """
+        self.has_next = len(rows) > self.page_size
+        page = rows[:self.page_size]
+        self.next_cursor = (
+            self.encode_cursor(page[-1]) if self.has_next else None
+        )
+        return page
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """
+        Returns the page of purchase orders that follows the request's cursor.
+        """
+        return self.finish_page(list(self.page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request):
+        """
+        Async variant of paginate_queryset for async views.
+        """
+        queryset = self.page_queryset(queryset, request)
+        return self.finish_page([row async for row in queryset])
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url,
+            self.cursor_query_param,
+            self.next_cursor
+        )
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                'next': self.get_next_link(),
+                'results': data
+            }
+        )
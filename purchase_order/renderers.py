@@ -0,0 +1,137 @@
+import csv
+import io
+import json
+import zlib
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.renderers import BaseRenderer
+
+# Columns written by the purchase order export, in order.
+EXPORT_FIELDS = [
+    'po_number',
+    'vendor',
+    'order_date',
+    'delivery_date',
+    'expected_delivery_date',
+    'items',
+    'quantity',
+    'status',
+    'quality_rating',
+    'issue_date',
+    'acknowledgment_date'
+]
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Renders rows as newline delimited JSON, one object per line.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def stream(self, rows):
+        """
+        Encode the rows one at a time so that no more than a single row
+        is ever held in memory.
+        """
+        for row in rows:
+            yield json.dumps(row, cls=DjangoJSONEncoder) + '\n'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # Error responses are a single object rather than a list of rows.
+        if isinstance(data, dict):
+            data = [data]
+        return ''.join(self.stream(data)).encode(self.charset)
+
+
+class CSVRenderer(BaseRenderer):
+    """
+    Renders rows as CSV with a header line, EXPORT_FIELDS by default.
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def stream(self, rows, fieldnames=EXPORT_FIELDS):
+        """
+        Encode the header and then each row, reusing a single line buffer.
+        """
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=fieldnames)
+        writer.writeheader()
+        for row in rows:
+            row = dict(row)
+            if row.get('items') is not None:
+                row['items'] = json.dumps(row['items'], cls=DjangoJSONEncoder)
+            writer.writerow(row)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+
+        # Header of an empty export.
+        if buffer.tell():
+            yield buffer.getvalue()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # Error responses are a single object rather than a list of rows.
+        if isinstance(data, dict):
+            data = [data]
+        fieldnames = list(data[0]) if data else EXPORT_FIELDS
+        return ''.join(self.stream(data, fieldnames)).encode(self.charset)
+
+
+def batch_stream(chunks, charset='utf-8', batch_size=65536):
+    """
+    Join small encoded chunks into blocks of roughly batch_size bytes so
+    the response is not flushed one row at a time.
+    """
+    pending = []
+    pending_size = 0
+    for chunk in chunks:
+        chunk = chunk.encode(charset)
+        pending.append(chunk)
+        pending_size += len(chunk)
+        if pending_size >= batch_size:
+            yield b''.join(pending)
+            pending = []
+            pending_size = 0
+    if pending:
+        yield b''.join(pending)
+
+
+def accepts_gzip(accept_encoding):
+    """
+    Returns True when an Accept-Encoding header accepts gzip: listed, or
+    matched by '*', with a q-value above 0. A coding listed with q=0 is
+    refused.
+    """
+    qualities = {}
+    for coding in accept_encoding.split(','):
+        name, *params = [part.strip() for part in coding.split(';')]
+        if not name:
+            continue
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name.lower()] = quality
+    for name in ('gzip', 'x-gzip', '*'):
+        if name in qualities:
+            return qualities[name] > 0
+    return False
+
+
+def gzip_stream(blocks):
+    """
+    Gzip a stream of byte blocks on the fly.
+    """
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    for block in blocks:
+        compressed = compressor.compress(block)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
@@ -1,11 +1,30 @@
 from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
 from rest_framework import serializers
+from vendor.models import VendorModel
+from vendor_management_system.sparse_fields import SparseFieldsetMixin
 from.models import PurchaseOrderModel
+from.utils.order_stats import (
+    add_contribution, apply_order_stats, order_contribution
+)
 
-utc = timezone.now()
+def purchase_order_defaults():
+    """
+    Returns the fields set on every new purchase order: the current time
+    as order and issue date, a delivery date 5 days later and the Pending
+    status.
+    """
+    order_date = timezone.localtime(timezone.now())
+    return {
+        'order_date': order_date,
+        'delivery_date': order_date + timedelta(days=5),
+        'status': "Pending",
+        'issue_date': order_date
+    }
 
-class PurchaseOrderSerializer(serializers.ModelSerializer):
+class PurchaseOrderSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Serializer for displaying purchase orders.
     """
@@ -13,12 +32,13 @@ class PurchaseOrderSerializer(serializers.ModelSerializer):
         model = PurchaseOrderModel
         fields = ['po_number', 'vendor', 'status']
 
-class PurchaseOrderCreateSerializer(serializers.ModelSerializer):
+class PurchaseOrderCreateSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Serializer for creating purchase orders.
     """
     order_date = serializers.DateTimeField(read_only=True)
     delivery_date = serializers.DateTimeField(read_only=True)
+    expected_delivery_date = serializers.DateTimeField(read_only=True)
 
     class Meta:
         model = PurchaseOrderModel
@@ -28,17 +48,122 @@ class PurchaseOrderCreateSerializer(serializers.ModelSerializer):
         """
         Override the create method to set order_date, delivery_date, and status.
         """
-        order_date = timezone.localtime(utc)
-        delivery_date = order_date + timedelta(days=5)
-        status = "Pending"
-        issue_date = order_date
+        validated_data.update(purchase_order_defaults())
+        return super().create(validated_data)
 
-        validated_data['order_date'] = order_date
-        validated_data['delivery_date'] = delivery_date
-        validated_data['status'] = status
-        validated_data['issue_date'] = issue_date
+class PurchaseOrderBulkCreateListSerializer(serializers.ListSerializer):
+    """
+    List serializer for creating many purchase orders at once.
 
-        return super().create(validated_data)
+    Items are validated in a single pass, vendors and existing PO numbers are
+    looked up with one query each, and the orders are inserted together with
+    bulk_create. Errors are reported per item, in the order of the request.
+    """
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list):
+            raise serializers.ValidationError(
+                {
+                    'non_field_errors': ['Expected a list of purchase orders.']
+                }
+            )
+        max_size = getattr(settings, 'PURCHASE_ORDER_BULK_MAX_SIZE', 1000)
+        if not data or len(data) > max_size:
+            raise serializers.ValidationError(
+                {
+                    'non_field_errors': [
+                        f'Expected between 1 and {max_size} purchase orders.'
+                    ]
+                }
+            )
+
+        validated = []
+        errors = []
+        for item in data:
+            try:
+                validated.append(self.child.run_validation(item))
+                errors.append({})
+            except serializers.ValidationError as exc:
+                validated.append(None)
+                errors.append(exc.detail)
+
+        valid_items = [attrs for attrs in validated if attrs is not None]
+        vendors = VendorModel.objects.in_bulk(
+            {attrs['vendor'] for attrs in valid_items}
+        )
+        existing_po_numbers = set(
+            PurchaseOrderModel.objects.filter(
+                po_number__in=[attrs['po_number'] for attrs in valid_items]
+            ).values_list('po_number', flat=True)
+        )
+
+        seen_po_numbers = set()
+        for index, attrs in enumerate(validated):
+            if attrs is None:
+                continue
+            item_errors = {}
+            vendor = vendors.get(attrs['vendor'])
+            if vendor is None:
+                item_errors['vendor'] = [
+                    f'Invalid pk "{attrs["vendor"]}" - object does not exist.'
+                ]
+            else:
+                attrs['vendor'] = vendor
+            po_number = attrs['po_number']
+            if po_number in existing_po_numbers or po_number in seen_po_numbers:
+                item_errors['po_number'] = [
+                    'purchase order model with this po number already exists.'
+                ]
+            seen_po_numbers.add(po_number)
+            if item_errors:
+                errors[index] = item_errors
+
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return validated
+
+    def create(self, validated_data):
+        """
+        Insert every purchase order in one transaction with the same
+        defaults as PurchaseOrderCreateSerializer.
+        """
+        defaults = purchase_order_defaults()
+        purchase_orders = [
+            PurchaseOrderModel(**attrs, **defaults)
+            for attrs in validated_data
+        ]
+        # bulk_create does not send post_save, so the vendors' order stats
+        # are updated here, once per vendor.
+        deltas = {}
+        for purchase_order in purchase_orders:
+            add_contribution(
+                deltas,
+                purchase_order.vendor_id,
+                order_contribution(purchase_order.tracker.current())
+            )
+        with transaction.atomic():
+            purchase_orders = PurchaseOrderModel.objects.bulk_create(
+                purchase_orders
+            )
+            apply_order_stats(deltas)
+        return purchase_orders
+
+class PurchaseOrderBulkCreateSerializer(serializers.ModelSerializer):
+    """
+    Serializer for one purchase order of a bulk create request.
+
+    The vendor code and PO number are checked for the whole batch at once by
+    PurchaseOrderBulkCreateListSerializer instead of per item.
+    """
+    vendor = serializers.CharField(max_length=9)
+
+    class Meta:
+        model = PurchaseOrderModel
+        fields = ['po_number', 'vendor', 'items', 'quantity']
+        extra_kwargs = {
+            'po_number': {'validators': []}
+        }
+        list_serializer_class = PurchaseOrderBulkCreateListSerializer
 
 class PurchaseOrderUpdateSerializer(serializers.ModelSerializer):
     """
@@ -59,3 +184,21 @@ class PurchaseOrderAcknowledgeSerializer(serializers.ModelSerializer):
     class Meta:
         model = PurchaseOrderModel
         fields = ['acknowledgment_date']
+
+class PurchaseOrderBulkAcknowledgeSerializer(serializers.Serializer):
+    """
+    Serializer for acknowledging many purchase orders at once.
+    """
+    po_numbers = serializers.ListField(
+        child=serializers.CharField(max_length=50),
+        allow_empty=False
+    )
+
+    def validate_po_numbers(self, value):
+        max_size = getattr(settings, 'PURCHASE_ORDER_BULK_MAX_SIZE', 1000)
+        if len(value) > max_size:
+            raise serializers.ValidationError(
+                f'Expected at most {max_size} purchase orders.'
+            )
+        # Keep the request order but drop repeated PO numbers.
+        return list(dict.fromkeys(value))
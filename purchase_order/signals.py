@@ -0,0 +1,40 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from . models import *
+from . utils.order_stats import (
+    add_contribution, apply_order_stats, order_contribution
+)
+
+
+@receiver(post_save, sender=PurchaseOrderModel)
+def update_order_stats(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    deltas = {}
+    current = instance.tracker.current()
+    if not created:
+        changed = instance.tracker.changed()
+        if not changed:
+            return
+        previous = dict(current, **changed)
+        add_contribution(
+            deltas,
+            previous['vendor'],
+            order_contribution(previous),
+            sign=-1
+        )
+    add_contribution(deltas, current['vendor'], order_contribution(current))
+    apply_order_stats(deltas)
+
+
+@receiver(post_delete, sender=PurchaseOrderModel)
+def remove_order_stats(sender, instance, **kwargs):
+    deltas = {}
+    add_contribution(
+        deltas,
+        instance.vendor_id,
+        order_contribution(instance.tracker.current()),
+        sign=-1
+    )
+    # The stats row may already be gone when the vendor itself is deleted.
+    apply_order_stats(deltas, rebuild_missing=False)
@@ -1,13 +1,37 @@
+import csv
+import gzip
+import io
 import json
+import re
 from rest_framework.test import APITestCase
+from django.test import TransactionTestCase
 from rest_framework import status
 from rest_framework_simplejwt.tokens import AccessToken
 from datetime import datetime, timedelta, date
 from django.utils import timezone
 from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connection, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from unittest import mock
 from.models import PurchaseOrderModel
 from.models import VendorModel
+from.models import VendorMetricJobModel
+from.models import VendorOrderStatsModel
+from.utils.metric_jobs import (
+    enqueue_vendor_metrics, metric_queue_stats, run_metric_jobs
+)
+from.utils.metric_stress import create_stress_orders, run_metric_stress
+from.utils.order_stats import order_stats_queryset, rebuild_order_stats
+from.utils.benchmark import endpoints
+from.renderers import accepts_gzip
+from vendor_management_system.metrics import METRIC_FUNCTION_DURATION
+from vendor.models import HistoricalPerformanceModel
 from.serializers import *
+from.utils.performance_metric_function import (
+    calculate_avg_response_time, update_vendor_metrics
+)
 
 
 class BaseApiTest(APITestCase):
@@ -73,7 +97,7 @@ class PurchaseOrderListAPIViewTest(BaseApiTest):
         # Test retrieving all purchase orders
         response = self.client.get('/api/purchase_orders/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 3)
+        self.assertEqual(len(response.data['results']), 3)
 
         # Test retrieving purchase orders by vendor
         response = self.client.get(
@@ -83,9 +107,9 @@ class PurchaseOrderListAPIViewTest(BaseApiTest):
             }
         )
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 3)
+        self.assertEqual(len(response.data['results']), 3)
         self.assertEqual(
-            response.data[0]['vendor'], 
+            response.data['results'][0]['vendor'], 
             self.vendor1.vendor_code
         )
 
@@ -96,7 +120,74 @@ class PurchaseOrderListAPIViewTest(BaseApiTest):
             response.status_code, 
             status.HTTP_200_OK
         )
-        self.assertEqual(len(response.data), 3)
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertIsNone(response.data['next'])
+
+    def test_get_purchase_orders_paginated(self):
+        # Walk the list two orders at a time by following the next cursor
+        response = self.client.get(
+            '/api/purchase_orders/',
+            {
+                'page_size': 2
+            }
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNotNone(response.data['next'])
+
+        next_page = self.client.get(response.data['next'])
+        self.assertEqual(next_page.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(next_page.data['results']), 1)
+        self.assertIsNone(next_page.data['next'])
+
+        po_numbers = [
+            order['po_number']
+            for order in response.data['results'] + next_page.data['results']
+        ]
+        self.assertCountEqual(po_numbers, ['PO001', 'PO002', 'PO003'])
+
+    def test_get_purchase_orders_paginated_by_vendor(self):
+        # The cursor keeps the vendor filter from the original request
+        response = self.client.get(
+            '/api/purchase_orders/',
+            {
+                'vendor': self.vendor1.vendor_code,
+                'page_size': 1
+            }
+        )
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertIn('vendor=VC001', response.data['next'])
+
+        response = self.client.get(
+            '/api/purchase_orders/',
+            {
+                'vendor': self.vendor2.vendor_code
+            }
+        )
+        self.assertEqual(response.data['results'], [])
+        self.assertIsNone(response.data['next'])
+
+    def test_get_purchase_orders_page_size_cap(self):
+        with self.settings(PURCHASE_ORDER_MAX_PAGE_SIZE=2):
+            response = self.client.get(
+                '/api/purchase_orders/',
+                {
+                    'page_size': 50
+                }
+            )
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_get_purchase_orders_invalid_cursor(self):
+        response = self.client.get(
+            '/api/purchase_orders/',
+            {
+                'cursor': 'not-a-cursor'
+            }
+        )
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_404_NOT_FOUND
+        )
 
     def test_post_purchase_order(self):
         # Data for creating a new vendor
@@ -137,6 +228,205 @@ class PurchaseOrderListAPIViewTest(BaseApiTest):
         )
 
 
+class PurchaseOrderBulkCreateAPIViewTest(BaseApiTest):
+    def bulk_data(self, start, count, vendor='VC001'):
+        return [
+            {
+                'po_number': f'BULK{number:03}',
+                'vendor': vendor,
+                'items': {'item': 'Test Item'},
+                'quantity': 5,
+            }
+            for number in range(start, start + count)
+        ]
+
+    def test_bulk_create(self):
+        before = timezone.now()
+        response = self.client.post(
+            '/api/purchase_orders/bulk/',
+            self.bulk_data(1, 3),
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [order['po_number'] for order in response.data],
+            ['BULK001', 'BULK002', 'BULK003']
+        )
+
+        # Same defaults as a single create
+        purchase_order = PurchaseOrderModel.objects.get(po_number='BULK002')
+        self.assertEqual(purchase_order.status, 'Pending')
+        self.assertEqual(purchase_order.vendor, self.vendor1)
+        self.assertEqual(
+            purchase_order.delivery_date - purchase_order.order_date,
+            timedelta(days=5)
+        )
+        # Dated when created, not when the server started
+        self.assertGreaterEqual(purchase_order.order_date, before)
+        self.assertLessEqual(purchase_order.order_date, timezone.now())
+
+    def test_bulk_create_query_count_is_constant(self):
+        # Load the authenticated user in the cache first.
+        self.client.get('/api/vendors/')
+        with CaptureQueriesContext(connection) as small_batch:
+            self.client.post(
+                '/api/purchase_orders/bulk/',
+                self.bulk_data(1, 2),
+                format='json'
+            )
+        with CaptureQueriesContext(connection) as large_batch:
+            self.client.post(
+                '/api/purchase_orders/bulk/',
+                self.bulk_data(10, 50),
+                format='json'
+            )
+        self.assertEqual(len(small_batch), len(large_batch))
+        self.assertEqual(
+            PurchaseOrderModel.objects.filter(vendor=self.vendor1).count(),
+            55
+        )
+
+    def test_bulk_create_errors_per_item(self):
+        data = self.bulk_data(1, 5)
+        data[1]['vendor'] = 'MISSING'
+        data[2]['po_number'] = 'PO001'
+        data[3]['quantity'] = -1
+        data[4]['po_number'] = data[0]['po_number']
+
+        response = self.client.post(
+            '/api/purchase_orders/bulk/',
+            data,
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(response.data), 5)
+        self.assertEqual(response.data[0], {})
+        self.assertIn('vendor', response.data[1])
+        self.assertIn('po_number', response.data[2])
+        self.assertIn('quantity', response.data[3])
+        self.assertIn('po_number', response.data[4])
+
+        # Nothing is created when any item is invalid
+        self.assertFalse(
+            PurchaseOrderModel.objects.filter(
+                po_number__startswith='BULK'
+            ).exists()
+        )
+
+    def test_bulk_create_batch_size(self):
+        response = self.client.post(
+            '/api/purchase_orders/bulk/',
+            [],
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        with self.settings(PURCHASE_ORDER_BULK_MAX_SIZE=2):
+            response = self.client.post(
+                '/api/purchase_orders/bulk/',
+                self.bulk_data(1, 3),
+                format='json'
+            )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class PurchaseOrderExportAPIViewTest(BaseApiTest):
+    def export(self, params=None, **extra):
+        response = self.client.get(
+            '/api/purchase_orders/export/',
+            params or {},
+            **extra
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content)
+
+    def test_export_ndjson(self):
+        response, body = self.export()
+        self.assertTrue(
+            response['Content-Type'].startswith('application/x-ndjson')
+        )
+        rows = [json.loads(line) for line in body.decode().splitlines()]
+        self.assertEqual(
+            [row['po_number'] for row in rows],
+            ['PO001', 'PO002', 'PO003']
+        )
+        self.assertEqual(rows[0]['vendor'], self.vendor1.vendor_code)
+        self.assertEqual(rows[0]['items'], {'item': 'Test Item'})
+
+    def test_export_csv(self):
+        # Format can be chosen with the query string or the Accept header
+        for params, extra in [
+            ({'format': 'csv'}, {}),
+            ({}, {'HTTP_ACCEPT': 'text/csv'}),
+        ]:
+            response, body = self.export(params, **extra)
+            self.assertTrue(response['Content-Type'].startswith('text/csv'))
+            rows = list(csv.DictReader(io.StringIO(body.decode())))
+            self.assertEqual(len(rows), 3)
+            self.assertEqual(rows[1]['po_number'], 'PO002')
+            self.assertEqual(json.loads(rows[1]['items']), {'item': 'Test Item'})
+
+    def test_export_filters(self):
+        self.purchase_order2.status = 'completed'
+        self.purchase_order2.save()
+
+        response, body = self.export({'status': 'completed'})
+        self.assertEqual(len(body.decode().splitlines()), 1)
+
+        response, body = self.export(
+            {
+                'format': 'csv',
+                'vendor': self.vendor2.vendor_code
+            }
+        )
+        # Only the CSV header is left
+        self.assertEqual(len(body.decode().splitlines()), 1)
+
+        response, body = self.export({'to': '2000-01-01'})
+        self.assertEqual(body, b'')
+
+        response = self.client.get(
+            '/api/purchase_orders/export/',
+            {
+                'from': 'yesterday'
+            }
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_gzip(self):
+        response, body = self.export(HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(
+            len(gzip.decompress(body).decode().splitlines()),
+            3
+        )
+
+    def test_export_gzip_refused(self):
+        for accept_encoding in ('gzip;q=0, deflate', 'gzip; q=0.0', 'br'):
+            response, body = self.export(HTTP_ACCEPT_ENCODING=accept_encoding)
+            self.assertFalse(response.has_header('Content-Encoding'))
+            self.assertEqual(len(body.decode().splitlines()), 3)
+
+    def test_accepts_gzip(self):
+        self.assertTrue(accepts_gzip('deflate, gzip;q=0.5'))
+        self.assertTrue(accepts_gzip('*'))
+        self.assertTrue(accepts_gzip('GZIP'))
+        self.assertFalse(accepts_gzip('gzip;q=0, *;q=1'))
+        self.assertFalse(accepts_gzip('*;q=0'))
+        self.assertFalse(accepts_gzip(''))
+
+    def test_export_unsupported_format(self):
+        response = self.client.get(
+            '/api/purchase_orders/export/',
+            HTTP_ACCEPT='application/xml'
+        )
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_406_NOT_ACCEPTABLE
+        )
+
+
 class PurchaseOrderSpecificAPIViewTest(BaseApiTest):
     def test_get_specific_purchase_order(self):
         response1 = self.client.get('/api/purchase_orders/PO003/')
@@ -152,8 +442,7 @@ class PurchaseOrderSpecificAPIViewTest(BaseApiTest):
 
         # Send a PUT request to update the purchase order
         response = self.client.put(
-            f'/api/purchase_orders/
-            {
+            f'/api/purchase_orders/{
                 self.purchase_order1.po_number
             }/', updated_data
         )
@@ -179,6 +468,40 @@ class PurchaseOrderSpecificAPIViewTest(BaseApiTest):
         if response.status_code == status.HTTP_400_BAD_REQUEST:
             self.assertTrue('quality_rating' in response.data)
 
+    def test_get_specific_purchase_order_not_modified(self):
+        url = f'/api/purchase_orders/{self.purchase_order1.po_number}/'
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # Acknowledging the order changes its version
+        self.client.post(f'{url}acknowledge/')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get('/api/purchase_orders/PO999/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_complete_purchase_order_keeps_expected_delivery_date(self):
+        self.purchase_order1.acknowledgment_date = timezone.now()
+        self.purchase_order1.save()
+
+        response = self.client.put(
+            f'/api/purchase_orders/{self.purchase_order1.po_number}/',
+            {
+                'quality_rating': 4
+            }
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        purchase_order = PurchaseOrderModel.objects.get(
+            po_number=self.purchase_order1.po_number
+        )
+        self.assertEqual(purchase_order.status, 'completed')
+        self.assertEqual(
+            purchase_order.expected_delivery_date,
+            self.purchase_order1.delivery_date
+        )
+
     # for testing delete api
     def test_delete_purchase_order(self):
         response = self.client.delete(
@@ -198,7 +521,7 @@ class PurchaseOrderSpecificAPIViewTest(BaseApiTest):
 
     def test_delete_invalid_vendor(self):
         response = self.client.delete(
-            f'/api/vendors/{self.purchase_orders4.po_number}/'
+            '/api/purchase_orders/PO999/'
         )
         self.assertEqual(
             response.status_code,
@@ -208,8 +531,7 @@ class PurchaseOrderSpecificAPIViewTest(BaseApiTest):
     def test_acknowledge_purchase_order(self):
         # Send a POST request to acknowledge the purchase order
         response = self.client.post(
-            f'/api/purchase_orders/
-            {
+            f'/api/purchase_orders/{
                 self.purchase_order1.po_number
             }/acknowledge/'
         )
@@ -243,3 +565,894 @@ class PurchaseOrderSpecificAPIViewTest(BaseApiTest):
                 response.data['message'],
                 'Already Acknowledged'
             )
+
+
+class BulkAcknowledgePurchaseOrderApiViewTest(BaseApiTest):
+    def test_acknowledgment_date_is_request_time(self):
+        before = timezone.now()
+        response = self.client.post(
+            '/api/purchase_orders/acknowledge/',
+            {'po_numbers': ['PO001']},
+            format='json'
+        )
+        after = timezone.now()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.purchase_order1.refresh_from_db()
+        self.assertGreaterEqual(self.purchase_order1.acknowledgment_date, before)
+        self.assertLessEqual(self.purchase_order1.acknowledgment_date, after)
+
+    def test_single_acknowledgment_and_completion_are_request_time(self):
+        before = timezone.now()
+        self.client.post('/api/purchase_orders/PO001/acknowledge/')
+        self.client.put('/api/purchase_orders/PO001/', {'quality_rating': 4})
+        after = timezone.now()
+        self.purchase_order1.refresh_from_db()
+        for value in (
+            self.purchase_order1.acknowledgment_date,
+            self.purchase_order1.delivery_date
+        ):
+            self.assertGreaterEqual(value, before)
+            self.assertLessEqual(value, after)
+
+    @override_settings(VENDOR_METRICS_DEFERRED=True)
+    def test_bulk_acknowledge(self):
+        self.purchase_order3.acknowledgment_date = timezone.now()
+        self.purchase_order3.save()
+
+        response = self.client.post(
+            '/api/purchase_orders/acknowledge/',
+            {
+                'po_numbers': ['PO001', 'PO002', 'PO003', 'PO999', 'PO001']
+            },
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['acknowledged'], ['PO001', 'PO002'])
+        self.assertEqual(response.data['already_acknowledged'], ['PO003'])
+        self.assertEqual(response.data['not_found'], ['PO999'])
+        self.assertFalse(
+            PurchaseOrderModel.objects.filter(
+                acknowledgment_date__isnull=True
+            ).exists()
+        )
+
+        # One metric job, run by the metric worker
+        self.assertEqual(VendorMetricJobModel.objects.count(), 1)
+        run_metric_jobs()
+
+        # One metric update and one history snapshot for the vendor
+        self.assertEqual(
+            HistoricalPerformanceModel.objects.filter(
+                vendor=self.vendor1
+            ).count(),
+            1
+        )
+        self.vendor1.refresh_from_db()
+        response_times = [
+            (
+                purchase_order.acknowledgment_date - purchase_order.order_date
+            ).total_seconds() / 3600
+            for purchase_order in PurchaseOrderModel.objects.all()
+        ]
+        self.assertAlmostEqual(
+            self.vendor1.average_response_time,
+            sum(response_times) / 3
+        )
+
+    def test_bulk_acknowledge_query_count_is_constant(self):
+        for number in range(4, 24):
+            PurchaseOrderModel.objects.create(
+                po_number=f'PO{number:03}',
+                vendor=self.vendor1,
+                # Distinct response times, so the vendor's average changes
+                order_date=timezone.make_aware(datetime(2024, 1, number)),
+                delivery_date=timezone.make_aware(datetime(2024, 2, 1)),
+                items={'item': 'Test Item'},
+                quantity=10
+            )
+        # Load the authenticated user in the cache first.
+        self.client.get('/api/vendors/')
+        with CaptureQueriesContext(connection) as small_batch:
+            self.client.post(
+                '/api/purchase_orders/acknowledge/',
+                {
+                    'po_numbers': ['PO001', 'PO002']
+                },
+                format='json'
+            )
+        with CaptureQueriesContext(connection) as large_batch:
+            self.client.post(
+                '/api/purchase_orders/acknowledge/',
+                {
+                    'po_numbers': [f'PO{number:03}' for number in range(3, 24)]
+                },
+                format='json'
+            )
+        self.assertEqual(len(small_batch), len(large_batch))
+
+    def test_bulk_acknowledge_invalid(self):
+        response = self.client.post(
+            '/api/purchase_orders/acknowledge/',
+            {
+                'po_numbers': []
+            },
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class RecomputeVendorMetricsCommandTest(BaseApiTest):
+    def test_recompute_vendor_metrics(self):
+        order_date = timezone.make_aware(datetime(2024, 1, 1))
+        # Completed on time, rated 4, acknowledged after 2 hours
+        PurchaseOrderModel.objects.filter(po_number='PO001').update(
+            status='completed',
+            expected_delivery_date=timezone.make_aware(datetime(2024, 2, 1)),
+            delivery_date=timezone.make_aware(datetime(2024, 1, 20)),
+            quality_rating=4,
+            acknowledgment_date=order_date + timedelta(hours=2)
+        )
+        # Completed late, rated 2, acknowledged after 4 hours
+        PurchaseOrderModel.objects.filter(po_number='PO002').update(
+            status='completed',
+            expected_delivery_date=timezone.make_aware(datetime(2024, 2, 1)),
+            delivery_date=timezone.make_aware(datetime(2024, 2, 10)),
+            quality_rating=2,
+            acknowledgment_date=order_date + timedelta(hours=4)
+        )
+        # Stale metrics on a vendor without purchase orders are reset
+        VendorModel.objects.filter(vendor_code='VC002').update(
+            fulfillment_rate=0.5
+        )
+
+        out = io.StringIO()
+        call_command('recompute_vendor_metrics', chunk_size=1, stdout=out)
+        self.assertIn('Recomputed metrics of 2 vendors (2 rows updated)', out.getvalue())
+
+        self.vendor1.refresh_from_db()
+        self.assertAlmostEqual(self.vendor1.on_time_delivery_rate, 0.5)
+        self.assertAlmostEqual(self.vendor1.quality_rating_avg, 3.0)
+        self.assertAlmostEqual(self.vendor1.average_response_time, 3.0)
+        self.assertAlmostEqual(self.vendor1.fulfillment_rate, 2 / 3)
+        self.vendor2.refresh_from_db()
+        self.assertEqual(self.vendor2.fulfillment_rate, 0.0)
+
+    def test_recompute_vendor_metrics_range(self):
+        PurchaseOrderModel.objects.filter(po_number='PO001').update(
+            status='completed'
+        )
+        out = io.StringIO()
+        call_command(
+            'recompute_vendor_metrics',
+            start='VC002',
+            end='VC002',
+            stdout=out
+        )
+        self.assertIn('Recomputed metrics of 1 vendors', out.getvalue())
+        self.vendor1.refresh_from_db()
+        self.assertEqual(self.vendor1.fulfillment_rate, 0.0)
+
+
+@override_settings(VENDOR_METRICS_DEFERRED=True)
+class MetricJobTest(BaseApiTest):
+    def setUp(self):
+        super().setUp()
+        for purchase_order in (self.purchase_order1, self.purchase_order2):
+            purchase_order.acknowledgment_date = (
+                purchase_order.order_date + timedelta(hours=2)
+            )
+            purchase_order.save()
+
+    def test_put_queues_coalesced_job(self):
+        self.client.put('/api/purchase_orders/PO001/', {'quality_rating': 4})
+        self.client.put('/api/purchase_orders/PO002/', {'quality_rating': 2})
+
+        # Nothing is recomputed inside the requests
+        self.vendor1.refresh_from_db()
+        self.assertEqual(self.vendor1.quality_rating_avg, 0.0)
+        self.assertFalse(
+            HistoricalPerformanceModel.objects.filter(
+                vendor=self.vendor1
+            ).exists()
+        )
+        self.assertEqual(metric_queue_stats()['depth'], 1)
+
+        self.assertEqual(run_metric_jobs(), 1)
+        self.vendor1.refresh_from_db()
+        self.assertAlmostEqual(self.vendor1.quality_rating_avg, 3.0)
+        self.assertAlmostEqual(self.vendor1.fulfillment_rate, 2 / 3)
+        self.assertEqual(
+            HistoricalPerformanceModel.objects.filter(
+                vendor=self.vendor1
+            ).count(),
+            1
+        )
+        self.assertEqual(metric_queue_stats(), {'depth': 0, 'lag': 0.0})
+
+    def test_put_query_count(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.put(
+                '/api/purchase_orders/PO001/',
+                {'quality_rating': 4}
+            )
+        statements = [
+            query['sql'] for query in queries
+            if query['sql'].startswith(('INSERT', 'UPDATE'))
+        ]
+        # The order, its vendor's stats and the job
+        self.assertEqual(len(statements), 3)
+
+    def test_job_requested_again_while_running_is_kept(self):
+        def request_again(vendor_code):
+            enqueue_vendor_metrics([vendor_code])
+
+        enqueue_vendor_metrics(['VC001'])
+        with mock.patch(
+            'purchase_order.utils.metric_jobs.refresh_vendor_metrics',
+            side_effect=request_again
+        ):
+            run_metric_jobs()
+        self.assertEqual(VendorMetricJobModel.objects.count(), 1)
+
+        run_metric_jobs()
+        self.assertEqual(VendorMetricJobModel.objects.count(), 0)
+
+    def test_failed_job_is_retried_later(self):
+        enqueue_vendor_metrics(['VC001'])
+        with mock.patch(
+            'purchase_order.utils.metric_jobs.refresh_vendor_metrics',
+            side_effect=RuntimeError('boom')
+        ):
+            with self.assertLogs('purchase_order.utils.metric_jobs'):
+                run_metric_jobs()
+        job = VendorMetricJobModel.objects.get()
+        self.assertEqual(job.attempts, 1)
+        self.assertIn('boom', job.last_error)
+        self.assertGreater(job.available_at, timezone.now())
+        # Backing off
+        self.assertEqual(run_metric_jobs(), 0)
+
+    @override_settings(DATABASE_LOCK_RETRY_SECONDS=0.05)
+    def test_locked_job_gives_up_and_backs_off(self):
+        enqueue_vendor_metrics(['VC001'])
+        refresh = mock.Mock(
+            side_effect=OperationalError('database table is locked')
+        )
+        with mock.patch(
+            'purchase_order.utils.metric_jobs.refresh_vendor_metrics',
+            refresh
+        ):
+            with self.assertLogs('purchase_order.utils.metric_jobs'):
+                self.assertEqual(run_metric_jobs(), 0)
+        # Retried with a growing wait, not once per millisecond
+        self.assertGreater(refresh.call_count, 1)
+        self.assertLess(refresh.call_count, 10)
+        job = VendorMetricJobModel.objects.get()
+        self.assertEqual(job.attempts, 1)
+        self.assertIn('locked', job.last_error)
+        self.assertGreater(job.available_at, timezone.now())
+
+    def test_delete_queues_job(self):
+        self.client.delete('/api/purchase_orders/PO001/')
+        job = VendorMetricJobModel.objects.get()
+        self.assertEqual(job.vendor_id, 'VC001')
+
+    def test_run_metric_worker_command(self):
+        enqueue_vendor_metrics(['VC001', 'VC002'])
+        out = io.StringIO()
+        call_command('run_metric_worker', '--stats', stdout=out)
+        self.assertIn('Metric queue depth: 2', out.getvalue())
+
+        out = io.StringIO()
+        call_command('run_metric_worker', '--once', stdout=out)
+        self.assertIn('Ran 2 metric jobs', out.getvalue())
+        self.assertEqual(VendorMetricJobModel.objects.count(), 0)
+
+    @override_settings(VENDOR_METRICS_DEFERRED=False)
+    def test_inline_metrics(self):
+        self.client.put('/api/purchase_orders/PO001/', {'quality_rating': 4})
+        self.vendor1.refresh_from_db()
+        self.assertAlmostEqual(self.vendor1.quality_rating_avg, 4.0)
+        self.assertFalse(VendorMetricJobModel.objects.exists())
+
+
+@override_settings(VENDOR_METRICS_DEFERRED=False)
+class VendorMetricUpdateTest(BaseApiTest):
+    def setUp(self):
+        super().setUp()
+        self.client.post('/api/purchase_orders/PO001/acknowledge/')
+
+    def vendor_updates(self, queries):
+        return [
+            query['sql'] for query in queries
+            if query['sql'].startswith('UPDATE "vendor_vendormodel"')
+        ]
+
+    def test_completing_put_writes_vendor_once(self):
+        history = HistoricalPerformanceModel.objects.filter(vendor=self.vendor1)
+        history_count = history.count()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.put(
+                '/api/purchase_orders/PO001/',
+                {'quality_rating': 4}
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        updates = self.vendor_updates(queries)
+        self.assertEqual(len(updates), 1)
+        # Only the changed metrics are written
+        self.assertIn('"quality_rating_avg"', updates[0])
+        self.assertIn('"fulfillment_rate"', updates[0])
+        self.assertNotIn('"average_response_time"', updates[0])
+        self.assertNotIn('"name"', updates[0])
+        self.assertEqual(history.count(), history_count + 1)
+
+        self.vendor1.refresh_from_db()
+        self.assertAlmostEqual(self.vendor1.quality_rating_avg, 4.0)
+        self.assertAlmostEqual(self.vendor1.fulfillment_rate, 1 / 3)
+
+    def test_delete_recomputes_metrics(self):
+        self.client.put('/api/purchase_orders/PO001/', {'quality_rating': 4})
+        self.vendor1.refresh_from_db()
+        self.assertAlmostEqual(self.vendor1.fulfillment_rate, 1 / 3)
+
+        response = self.client.delete('/api/purchase_orders/PO002/')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.vendor1.refresh_from_db()
+        self.assertAlmostEqual(self.vendor1.fulfillment_rate, 1 / 2)
+
+        self.client.delete('/api/purchase_orders/PO001/')
+        self.vendor1.refresh_from_db()
+        self.assertAlmostEqual(self.vendor1.fulfillment_rate, 0.0)
+        self.assertAlmostEqual(self.vendor1.quality_rating_avg, 0.0)
+
+    def test_metric_function_calls_are_measured(self):
+        name = 'update_vendor_metrics'
+        calls = METRIC_FUNCTION_DURATION.items
+        before = dict(calls()).get((name,), [0])[-1]
+        update_vendor_metrics(self.vendor1)
+        self.assertEqual(dict(calls())[(name,)][-1], before + 1)
+
+        response = self.client.get('/metrics')
+        self.assertIn(
+            'vendor_metric_function_duration_seconds_count'
+            f'{{function="{name}"}} {before + 1}',
+            response.content.decode()
+        )
+
+    def test_unchanged_metrics_are_not_written(self):
+        self.vendor1.refresh_from_db()
+        updated_at = self.vendor1.updated_at
+        history_count = HistoricalPerformanceModel.objects.count()
+        self.assertEqual(update_vendor_metrics(self.vendor1), [])
+        self.vendor1.refresh_from_db()
+        self.assertEqual(self.vendor1.updated_at, updated_at)
+        self.assertEqual(
+            HistoricalPerformanceModel.objects.count(),
+            history_count
+        )
+
+
+class ConcurrentMetricUpdateTest(TransactionTestCase):
+    def test_no_lost_updates(self):
+        po_numbers = create_stress_orders('STRESS', 40)
+        result = run_metric_stress('STRESS', po_numbers, threads=4, seed=1)
+        self.assertEqual(result['errors'], [])
+        self.assertEqual(result['lost_stats'], [])
+        self.assertEqual(result['lost_metrics'], [])
+        self.assertGreater(result['throughput'], 0)
+
+        stats = VendorOrderStatsModel.objects.get(vendor='STRESS')
+        self.assertEqual(stats.rated_count, 40)
+        self.assertEqual(stats.acknowledged_count, 40)
+
+    @override_settings(DATABASE_LOCK_RETRY_SECONDS=0.05)
+    def test_writer_locked_out_reports_error(self):
+        po_numbers = create_stress_orders('STRESS', 4)
+        with mock.patch(
+            'purchase_order.utils.metric_stress.rate_and_acknowledge',
+            side_effect=OperationalError('database table is locked')
+        ):
+            result = run_metric_stress('STRESS', po_numbers, threads=2)
+        self.assertEqual(len(result['errors']), 2)
+        self.assertIn('locked', result['errors'][0])
+        self.assertGreater(result['retries'], 0)
+
+    def test_stress_vendor_metrics_command(self):
+        out = io.StringIO()
+        call_command(
+            'stress_vendor_metrics',
+            threads=2,
+            orders=10,
+            stdout=out
+        )
+        self.assertIn('No lost updates', out.getvalue())
+        self.assertFalse(VendorModel.objects.filter(vendor_code='STRESS'))
+
+    def test_metric_workers_run_each_job_once(self):
+        vendor_codes = [f'MW{number:04}' for number in range(200)]
+        VendorModel.objects.bulk_create(
+            [
+                VendorModel(
+                    vendor_code=vendor_code,
+                    name=vendor_code,
+                    contact_details='-',
+                    address='-'
+                )
+                for vendor_code in vendor_codes
+            ]
+        )
+        enqueue_vendor_metrics(vendor_codes)
+        refreshed = []
+
+        def refresh(vendor_code):
+            # Recomputations rolled back by a locked table are retried.
+            transaction.on_commit(lambda: refreshed.append(vendor_code))
+
+        out = io.StringIO()
+        with mock.patch(
+            'purchase_order.utils.metric_jobs.refresh_vendor_metrics',
+            side_effect=refresh
+        ):
+            call_command(
+                'run_metric_worker',
+                '--once',
+                workers=4,
+                batch_size=10,
+                stdout=out
+            )
+        self.assertEqual(sorted(refreshed), vendor_codes)
+        self.assertIn('Ran 200 metric jobs', out.getvalue())
+        self.assertFalse(VendorMetricJobModel.objects.exists())
+
+
+class VendorOrderStatsTest(BaseApiTest):
+    def stats_values(self, vendor):
+        stats = VendorOrderStatsModel.objects.get(vendor=vendor)
+        return {
+            'total_count': stats.total_count,
+            'completed_count': stats.completed_count,
+            'on_time_count': stats.on_time_count,
+            'rated_count': stats.rated_count,
+            'acknowledged_count': stats.acknowledged_count,
+            'quality_rating_sum': stats.quality_rating_sum,
+            'response_time_sum': round(stats.response_time_sum, 6),
+        }
+
+    def test_stats_follow_purchase_order_writes(self):
+        self.assertEqual(self.stats_values(self.vendor1)['total_count'], 3)
+
+        self.purchase_order1.acknowledgment_date = (
+            self.purchase_order1.order_date + timedelta(hours=6)
+        )
+        self.purchase_order1.save()
+        self.purchase_order1.expected_delivery_date = (
+            self.purchase_order1.delivery_date
+        )
+        self.purchase_order1.status = 'completed'
+        self.purchase_order1.quality_rating = 4
+        self.purchase_order1.save()
+        self.purchase_order1.quality_rating = 5
+        self.purchase_order1.save()
+        self.purchase_order2.vendor = self.vendor2
+        self.purchase_order2.save()
+        self.purchase_order3.delete()
+
+        self.assertEqual(
+            self.stats_values(self.vendor1),
+            {
+                'total_count': 1,
+                'completed_count': 1,
+                'on_time_count': 1,
+                'rated_count': 1,
+                'acknowledged_count': 1,
+                'quality_rating_sum': 5.0,
+                'response_time_sum': 6.0,
+            }
+        )
+        self.assertEqual(self.stats_values(self.vendor2)['total_count'], 1)
+
+        # Incremental stats match a rebuild from the purchase orders
+        incremental = self.stats_values(self.vendor1)
+        rebuild_order_stats([self.vendor1.vendor_code])
+        self.assertEqual(self.stats_values(self.vendor1), incremental)
+
+    def test_missing_stats_are_rebuilt(self):
+        VendorOrderStatsModel.objects.all().delete()
+        self.purchase_order1.quality_rating = 3
+        self.purchase_order1.save()
+        self.assertEqual(
+            self.stats_values(self.vendor1)['rated_count'],
+            1
+        )
+        self.assertEqual(
+            self.stats_values(self.vendor1)['total_count'],
+            3
+        )
+
+    def test_metric_update_does_not_count_purchase_orders(self):
+        self.purchase_order1.acknowledgment_date = timezone.now()
+        self.purchase_order1.save()
+        with CaptureQueriesContext(connection) as queries:
+            calculate_avg_response_time(None, self.purchase_order1)
+        self.assertFalse(
+            any(
+                'COUNT(' in query['sql'].upper()
+                for query in queries.captured_queries
+            )
+        )
+
+    def test_delete_vendor_with_purchase_orders(self):
+        self.vendor1.delete()
+        self.assertFalse(
+            VendorOrderStatsModel.objects.filter(
+                vendor='VC001'
+            ).exists()
+        )
+
+
+class PurchaseOrderQueryPlanTest(BaseApiTest):
+    """
+    Fails when a query on the purchase order table falls back to a full
+    table scan according to EXPLAIN QUERY PLAN.
+    """
+    table = PurchaseOrderModel._meta.db_table
+
+    def query_plan(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assertNoTableScan(self, sql):
+        plan = self.query_plan(sql)
+        for step in plan:
+            self.assertIsNone(
+                re.match(rf'SCAN {self.table}$', step),
+                f'Full table scan in {plan} for {sql}'
+            )
+        return plan
+
+    def assertQueriesUseIndexes(self, queries):
+        statements = [
+            query['sql'] for query in queries.captured_queries
+            if self.table in query['sql'] and
+            query['sql'].split(' ', 1)[0] in ('SELECT', 'UPDATE', 'DELETE')
+        ]
+        self.assertTrue(statements)
+        for sql in statements:
+            self.assertNoTableScan(sql)
+
+    def test_list_and_export_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                '/api/purchase_orders/',
+                {
+                    'page_size': 1
+                }
+            )
+            self.client.get(response.data['next'])
+            for params in [
+                {'vendor': 'VC001'},
+                {'status': 'Pending'},
+                {'vendor': 'VC001', 'status': 'Pending'},
+                {'from': '2024-01-01', 'to': '2030-01-01'},
+            ]:
+                self.client.get('/api/purchase_orders/', params)
+                b''.join(
+                    self.client.get(
+                        '/api/purchase_orders/export/',
+                        params
+                    ).streaming_content
+                )
+        self.assertQueriesUseIndexes(queries)
+
+        # Pages are read in index order without sorting the table
+        for query in queries.captured_queries:
+            if 'ORDER BY' in query['sql'] and self.table in query['sql']:
+                self.assertNotIn(
+                    'USE TEMP B-TREE FOR ORDER BY',
+                    self.query_plan(query['sql'])
+                )
+
+    def test_write_and_metric_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/purchase_orders/PO001/')
+            self.client.post('/api/purchase_orders/PO001/acknowledge/')
+            self.client.put(
+                '/api/purchase_orders/PO001/',
+                {
+                    'quality_rating': 4
+                }
+            )
+            self.client.post(
+                '/api/purchase_orders/acknowledge/',
+                {
+                    'po_numbers': ['PO002', 'PO003']
+                },
+                format='json'
+            )
+            self.client.post(
+                '/api/purchase_orders/bulk/',
+                [
+                    {
+                        'po_number': 'PO004',
+                        'vendor': 'VC002',
+                        'items': {'item': 'Test Item'},
+                        'quantity': 1
+                    }
+                ],
+                format='json'
+            )
+            self.client.delete('/api/purchase_orders/PO004/')
+            call_command('recompute_vendor_metrics', stdout=io.StringIO())
+        self.assertQueriesUseIndexes(queries)
+
+    def test_vendor_metric_filters(self):
+        querysets = [
+            PurchaseOrderModel.objects.filter(
+                vendor=self.vendor1,
+                status='completed'
+            ),
+            PurchaseOrderModel.objects.filter(
+                vendor=self.vendor1,
+                quality_rating__isnull=False
+            ),
+            PurchaseOrderModel.objects.filter(
+                vendor=self.vendor1,
+                acknowledgment_date__isnull=False
+            ),
+            PurchaseOrderModel.objects.filter(
+                acknowledgment_date__isnull=False
+            ),
+            PurchaseOrderModel.objects.filter(vendor=self.vendor1),
+        ]
+        for queryset in querysets:
+            sql, params = queryset.values('pk').query.sql_with_params()
+            with connection.cursor() as cursor:
+                sql = connection.ops.last_executed_query(cursor, sql, params)
+            self.assertNoTableScan(sql)
+
+
+class AsyncPurchaseOrderAPIViewTest(BaseApiTest):
+    def setUp(self):
+        super().setUp()
+        self.headers = {'authorization': f'Bearer {self.access_token}'}
+
+    async def test_list_matches_sync_view(self):
+        response = await self.async_client.get(
+            '/api/async/purchase_orders/?page_size=2',
+            headers=self.headers
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        sync_response = await self.async_client.get(
+            '/api/purchase_orders/?page_size=2',
+            headers=self.headers
+        )
+        page = response.json()
+        self.assertEqual(page['results'], sync_response.json()['results'])
+        self.assertEqual(len(page['results']), 2)
+
+        response = await self.async_client.get(
+            page['next'],
+            headers=self.headers
+        )
+        self.assertEqual(
+            [order['po_number'] for order in response.json()['results']],
+            ['PO003']
+        )
+        self.assertIsNone(response.json()['next'])
+
+    async def test_list_errors(self):
+        response = await self.async_client.get(
+            '/api/async/purchase_orders/?cursor=bad',
+            headers=self.headers
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response.json(), {'detail': 'Invalid cursor'})
+
+        response = await self.async_client.get(
+            '/api/async/purchase_orders/?from=yesterday',
+            headers=self.headers
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_get_purchase_order(self):
+        response = await self.async_client.get(
+            '/api/async/purchase_orders/PO001/',
+            headers=self.headers
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['vendor'], 'VC001')
+        self.assertEqual(response.json()['quantity'], 10)
+
+        response = await self.async_client.get(
+            '/api/async/purchase_orders/PO001/',
+            headers={**self.headers, 'if-none-match': response['ETag']}
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        response = await self.async_client.get(
+            '/api/async/purchase_orders/PO999/',
+            headers=self.headers
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class SeedSyntheticCommandTest(BaseApiTest):
+    def test_seed_synthetic(self):
+        out = io.StringIO()
+        call_command(
+            'seed_synthetic',
+            vendors=20,
+            orders=500,
+            seed=7,
+            batch_size=64,
+            stdout=out
+        )
+        self.assertIn('Created 20 vendors and 500 purchase orders', out.getvalue())
+        orders = PurchaseOrderModel.objects.filter(po_number__startswith='SYN')
+        self.assertEqual(orders.count(), 500)
+        self.assertEqual(
+            set(orders.values_list('status', flat=True)),
+            {'pending', 'completed', 'canceled'}
+        )
+        self.assertFalse(
+            orders.filter(
+                acknowledgment_date__isnull=True
+            ).exclude(status='pending').exists()
+        )
+        self.assertFalse(
+            orders.exclude(quality_rating__isnull=True).exclude(
+                quality_rating__in=[1, 2, 3, 4, 5]
+            ).exists()
+        )
+
+        # Stats and metrics are rebuilt from the generated orders.
+        vendor_codes = list(
+            VendorModel.objects.filter(
+                vendor_code__startswith='SYN'
+            ).values_list('vendor_code', flat=True)
+        )
+        self.assertEqual(len(vendor_codes), 20)
+        for expected in order_stats_queryset(vendor_codes):
+            stats = VendorOrderStatsModel.objects.get(vendor=expected['vendor'])
+            self.assertEqual(stats.completed_count, expected['completed_count'])
+            self.assertEqual(stats.rated_count, expected['rated_count'])
+
+        with self.assertRaises(CommandError):
+            call_command('seed_synthetic', vendors=1, orders=1, stdout=out)
+
+
+class SparseFieldsetTest(BaseApiTest):
+    def get_with_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        order_queries = [
+            query['sql'] for query in queries
+            if 'FROM "purchase_order_purchaseordermodel"' in query['sql']
+        ]
+        return response, order_queries
+
+    def test_detail_fields(self):
+        response, queries = self.get_with_queries(
+            '/api/purchase_orders/PO001/?fields=status,delivery_date'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data), {'status', 'delivery_date'})
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('"items"', queries[0])
+
+    def test_detail_exclude(self):
+        response, queries = self.get_with_queries(
+            '/api/purchase_orders/PO001/?exclude=items'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('items', response.data)
+        self.assertIn('quantity', response.data)
+        self.assertNotIn('"items"', queries[0])
+
+    def test_async_detail_fields(self):
+        response = self.client.get(
+            '/api/async/purchase_orders/PO001/?fields=po_number,status'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.json(),
+            {'po_number': 'PO001', 'status': 'Pending'}
+        )
+
+    def test_list_fields(self):
+        response, queries = self.get_with_queries(
+            '/api/purchase_orders/?fields=po_number&page_size=2'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [order for order in response.data['results']],
+            [{'po_number': 'PO001'}, {'po_number': 'PO002'}]
+        )
+        # One query for the page, the cursor columns included.
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('"status"', queries[0])
+        self.assertIn('fields=po_number', response.data['next'])
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual(
+            response.data['results'],
+            [{'po_number': 'PO003'}]
+        )
+
+    def test_sparse_etag_differs(self):
+        full = self.client.get('/api/purchase_orders/PO001/')
+        sparse = self.client.get('/api/purchase_orders/PO001/?fields=status')
+        self.assertNotEqual(full['ETag'], sparse['ETag'])
+        response = self.client.get(
+            '/api/purchase_orders/PO001/?fields=status',
+            HTTP_IF_NONE_MATCH=sparse['ETag']
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_invalid_fields(self):
+        for url in [
+            '/api/purchase_orders/PO001/?fields=status,price',
+            '/api/purchase_orders/PO001/?fields=status&exclude=items',
+            '/api/purchase_orders/PO001/?fields=',
+            '/api/purchase_orders/?exclude=po_number,vendor,status',
+            '/api/async/purchase_orders/?fields=price'
+        ]:
+            response = self.client.get(url)
+            self.assertEqual(
+                response.status_code, status.HTTP_400_BAD_REQUEST, url
+            )
+
+
+class BenchSQLiteWritesCommandTest(BaseApiTest):
+    def test_invalid_options(self):
+        for options in [{'orders': 0}, {'concurrency': 0}]:
+            with self.assertRaises(CommandError):
+                call_command(
+                    'bench_sqlite_writes',
+                    stdout=io.StringIO(),
+                    **options
+                )
+
+
+class BenchCommandTest(BaseApiTest):
+    def test_bench_every_endpoint(self):
+        out = io.StringIO()
+        call_command(
+            'bench',
+            username='testuser',
+            requests=2,
+            stdout=out
+        )
+        report = json.loads(out.getvalue())
+        self.assertEqual(report['unbenchmarked'], [])
+        self.assertEqual(
+            {(result['method'], result['route']) for result in report['results']},
+            set(endpoints())
+        )
+        for result in report['results']:
+            self.assertEqual(result['failed'], 0, result)
+            self.assertEqual(result['requests'], 2)
+            self.assertIn('p99', result['latency_ms'])
+            self.assertIsNotNone(result['queries'], result)
+        # The throwaway rows are gone.
+        self.assertFalse(
+            VendorModel.objects.filter(vendor_code__startswith='BN').exists()
+        )
+        self.assertEqual(PurchaseOrderModel.objects.count(), 3)
+
+    def test_bench_selected_endpoints(self):
+        out = io.StringIO()
+        call_command(
+            'bench',
+            username='testuser',
+            requests=1,
+            endpoint=['leaderboard'],
+            stdout=out
+        )
+        report = json.loads(out.getvalue())
+        self.assertEqual(
+            [result['route'] for result in report['results']],
+            ['api/vendors/leaderboard/']
+        )
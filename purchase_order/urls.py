@@ -6,6 +6,21 @@ urlpatterns=[
          PurchaseOrderListAPIView.as_view(),
          name="Get-Purchase-Oder"
      ),
+    path(
+        'api/purchase_orders/bulk/',
+         PurchaseOrderBulkCreateAPIView.as_view(),
+         name="Bulk-Create-Purchase-Order"
+     ),
+    path(
+        'api/purchase_orders/acknowledge/',
+         BulkAcknowledgePurchaseOrderApiView.as_view(),
+         name='Bulk-Acknowledgment'
+     ),
+    path(
+        'api/purchase_orders/export/',
+         PurchaseOrderExportAPIView.as_view(),
+         name="Export-Purchase-Order"
+     ),
     path(
         'api/purchase_orders/<str:pk>/',
          PurchaseOrderSpecificAPIView.as_view(),
@@ -15,5 +30,15 @@ urlpatterns=[
          'api/purchase_orders/<str:pk>/acknowledge/',
          AcknowledgePurchaseOrderApiView.as_view(),
          name='Acknowledgment'
+     ),
+    path(
+        'api/async/purchase_orders/',
+         AsyncPurchaseOrderListAPIView.as_view(),
+         name="Async-Get-Purchase-Oder"
+     ),
+    path(
+        'api/async/purchase_orders/<str:pk>/',
+         AsyncPurchaseOrderSpecificAPIView.as_view(),
+         name="Async-Specific-Purchase-Order"
      )
 ]
\ No newline at end of file
@@ -0,0 +1,489 @@
+"""
+Load benchmark of every vendor and purchase order endpoint.
+
+Each endpoint is sent a number of requests by concurrent workers, either
+in-process through the Django test client or over HTTP to a running
+server. Write endpoints work on throwaway rows whose vendor codes and PO
+numbers start with a prefix, created before the run and deleted after it.
+"""
+import json
+import math
+import threading
+import time
+from contextlib import ExitStack
+from datetime import timedelta
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from purchase_order import urls as purchase_order_urls
+from purchase_order.models import PurchaseOrderModel
+from vendor import urls as vendor_urls
+from vendor.models import VendorModel
+from .performance_metric_function import recompute_vendor_metrics
+
+# Longest prefix leaving room for a pool letter and a 5 digit number in a
+# vendor code.
+MAX_PREFIX_LENGTH = 3
+
+# Purchase orders created or acknowledged per bulk request.
+BULK_SIZE = 10
+
+HTTP_METHODS = ['get', 'post', 'put', 'delete']
+
+
+def percentile(latencies, fraction):
+    """
+    Returns the nearest-rank percentile of a sorted list of latencies.
+    """
+    index = max(math.ceil(fraction * len(latencies)) - 1, 0)
+    return latencies[index]
+
+
+def endpoints():
+    """
+    Returns the (method, route) of every endpoint of the vendor and purchase
+    order URLs.
+    """
+    found = []
+    for pattern in vendor_urls.urlpatterns + purchase_order_urls.urlpatterns:
+        view_class = pattern.callback.view_class
+        for method in HTTP_METHODS:
+            if hasattr(view_class, method):
+                found.append((method.upper(), str(pattern.pattern)))
+    return found
+
+
+class BenchData:
+    """
+    The rows the benchmark requests target.
+
+    Reads target an existing purchase order and its vendor when there is
+    one. Writes target throwaway pools of rows, one row (or BULK_SIZE rows)
+    per request:
+
+    - Vendor pools: D (deleted) and N (created).
+    - Purchase order pools: K (acknowledged), A (already acknowledged,
+      updated), X (deleted), B (bulk acknowledged), N (created) and
+      M (bulk created).
+    """
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+        self.vendor = self.vendor_code('V', 0)
+
+    def vendor_code(self, pool, number):
+        return f'{self.prefix}{pool}{number:05}'
+
+    def po_number(self, pool, number):
+        return f'{self.prefix}-{pool}-{number:07}'
+
+    def create(self, requests):
+        """
+        Create the throwaway vendor, the vendors and purchase orders of the
+        pools, and pick the targets of the reads.
+        """
+        now = timezone.now()
+        VendorModel.objects.bulk_create(
+            [
+                VendorModel(
+                    vendor_code=vendor_code,
+                    name=f'Bench vendor {vendor_code}',
+                    contact_details='-',
+                    address='-'
+                )
+                for vendor_code in [self.vendor] + [
+                    self.vendor_code('D', number) for number in range(requests)
+                ]
+            ],
+            batch_size=1000
+        )
+        pools = [
+            ('K', requests, False),
+            ('A', requests, True),
+            ('X', requests, False),
+            ('B', requests * BULK_SIZE, False)
+        ]
+        PurchaseOrderModel.objects.bulk_create(
+            [
+                PurchaseOrderModel(
+                    po_number=self.po_number(pool, number),
+                    vendor_id=self.vendor,
+                    order_date=now,
+                    delivery_date=now + timedelta(days=7),
+                    items={'item': 'Bench item'},
+                    quantity=1,
+                    status='pending',
+                    acknowledgment_date=now if acknowledged else None
+                )
+                for pool, count, acknowledged in pools
+                for number in range(count)
+            ],
+            batch_size=1000
+        )
+        recompute_vendor_metrics([self.vendor])
+
+        sample = PurchaseOrderModel.objects.exclude(
+            vendor__vendor_code__startswith=self.prefix
+        ).values_list('po_number', 'vendor').first()
+        if sample is None:
+            sample = (self.po_number('A', 0), self.vendor)
+        self.read_po_number, self.read_vendor = sample
+
+    def delete(self):
+        VendorModel.objects.filter(
+            vendor_code__startswith=self.prefix
+        ).delete()
+
+
+def bench_requests(data, page_size):
+    """
+    Returns, per (method, route), a function building the path and body of
+    the request with a given index.
+    """
+    vendor = f'/api/vendors/{data.read_vendor}/'
+    purchase_order = f'/api/purchase_orders/{data.read_po_number}/'
+    return {
+        ('GET', 'api/vendors/'): lambda index: ('/api/vendors/', None),
+        ('POST', 'api/vendors/'): lambda index: (
+            '/api/vendors/',
+            {
+                'vendor_code': data.vendor_code('N', index),
+                'name': 'Bench vendor',
+                'contact_details': '-',
+                'address': '-'
+            }
+        ),
+        ('GET', 'api/vendors/leaderboard/'): lambda index: (
+            '/api/vendors/leaderboard/', None
+        ),
+        # Successive keystrokes of a search box.
+        ('GET', 'api/vendors/search/'): lambda index: (
+            f"/api/vendors/search/?q={'vendor'[:index % 5 + 2]}", None
+        ),
+        ('GET', 'api/vendors/<str:pk>/'): lambda index: (vendor, None),
+        ('PUT', 'api/vendors/<str:pk>/'): lambda index: (
+            f'/api/vendors/{data.vendor}/',
+            {'name': f'Bench vendor {index}'}
+        ),
+        ('DELETE', 'api/vendors/<str:pk>/'): lambda index: (
+            f"/api/vendors/{data.vendor_code('D', index)}/", None
+        ),
+        ('GET', 'api/vendors/<str:pk>/performance/'): lambda index: (
+            f'{vendor}performance/', None
+        ),
+        ('GET', 'api/vendors/<str:pk>/performance/history/'): lambda index: (
+            f'{vendor}performance/history/', None
+        ),
+        ('GET', 'api/vendors/<str:pk>/rank/'): lambda index: (
+            f'{vendor}rank/', None
+        ),
+        ('GET', 'api/async/vendors/'): lambda index: (
+            '/api/async/vendors/', None
+        ),
+        ('GET', 'api/async/vendors/<str:pk>/'): lambda index: (
+            f'/api/async/vendors/{data.read_vendor}/', None
+        ),
+        ('GET', 'api/async/vendors/<str:pk>/performance/'): lambda index: (
+            f'/api/async/vendors/{data.read_vendor}/performance/', None
+        ),
+        ('GET', 'api/purchase_orders/'): lambda index: (
+            f'/api/purchase_orders/?page_size={page_size}', None
+        ),
+        ('POST', 'api/purchase_orders/'): lambda index: (
+            '/api/purchase_orders/',
+            {
+                'po_number': data.po_number('N', index),
+                'vendor': data.vendor,
+                'items': {'item': 'Bench item'},
+                'quantity': 1
+            }
+        ),
+        ('POST', 'api/purchase_orders/bulk/'): lambda index: (
+            '/api/purchase_orders/bulk/',
+            [
+                {
+                    'po_number': data.po_number('M', index * BULK_SIZE + item),
+                    'vendor': data.vendor,
+                    'items': {'item': 'Bench item'},
+                    'quantity': 1
+                }
+                for item in range(BULK_SIZE)
+            ]
+        ),
+        ('POST', 'api/purchase_orders/acknowledge/'): lambda index: (
+            '/api/purchase_orders/acknowledge/',
+            {
+                'po_numbers': [
+                    data.po_number('B', index * BULK_SIZE + item)
+                    for item in range(BULK_SIZE)
+                ]
+            }
+        ),
+        # Exports the read vendor's orders rather than the whole table.
+        ('GET', 'api/purchase_orders/export/'): lambda index: (
+            f'/api/purchase_orders/export/?vendor={data.read_vendor}'
+            '&format=ndjson',
+            None
+        ),
+        ('GET', 'api/purchase_orders/<str:pk>/'): lambda index: (
+            purchase_order, None
+        ),
+        ('PUT', 'api/purchase_orders/<str:pk>/'): lambda index: (
+            f"/api/purchase_orders/{data.po_number('A', index)}/",
+            {'quality_rating': index % 5 + 1}
+        ),
+        ('DELETE', 'api/purchase_orders/<str:pk>/'): lambda index: (
+            f"/api/purchase_orders/{data.po_number('X', index)}/", None
+        ),
+        ('POST', 'api/purchase_orders/<str:pk>/acknowledge/'): lambda index: (
+            f"/api/purchase_orders/{data.po_number('K', index)}/acknowledge/",
+            None
+        ),
+        ('GET', 'api/async/purchase_orders/'): lambda index: (
+            f'/api/async/purchase_orders/?page_size={page_size}', None
+        ),
+        ('GET', 'api/async/purchase_orders/<str:pk>/'): lambda index: (
+            f'/api/async/purchase_orders/{data.read_po_number}/', None
+        )
+    }
+
+
+class ClientTransport:
+    """
+    Sends requests in-process through the Django test client, one client
+    per thread, counting the queries each request runs.
+    """
+
+    def __init__(self, token):
+        self.token = token
+        self.local = threading.local()
+
+    def send(self, method, path, body):
+        client = getattr(self.local, 'client', None)
+        if client is None:
+            client = self.local.client = Client(
+                raise_request_exception=False,
+                HTTP_AUTHORIZATION=f'Bearer {self.token}'
+            )
+        with ExitStack() as stack:
+            # Reads of some views are routed to the replicas.
+            queries = [
+                stack.enter_context(CaptureQueriesContext(connections[alias]))
+                for alias in [
+                    DEFAULT_DB_ALIAS,
+                    *getattr(settings, 'DATABASE_REPLICAS', [])
+                ]
+            ]
+            response = client.generic(
+                method,
+                path,
+                data=json.dumps(body) if body is not None else '',
+                content_type='application/json'
+            )
+            if response.streaming:
+                b''.join(response.streaming_content)
+        return response.status_code, sum(len(captured) for captured in queries)
+
+
+class HttpTransport:
+    """
+    Sends requests to a running server. Query counts are not available.
+    """
+
+    def __init__(self, token, base_url):
+        self.token = token
+        self.base_url = base_url.rstrip('/')
+
+    def send(self, method, path, body):
+        request = Request(
+            self.base_url + path,
+            data=json.dumps(body).encode('utf-8') if body is not None else None,
+            method=method,
+            headers={
+                'Authorization': f'Bearer {self.token}',
+                'Content-Type': 'application/json'
+            }
+        )
+        try:
+            with urlopen(request) as response:
+                response.read()
+                return response.status, None
+        except HTTPError as exc:
+            exc.read()
+            return exc.code, None
+
+
+def run_endpoint(transport, method, build, requests, concurrency):
+    """
+    Send `requests` requests to one endpoint from `concurrency` workers.
+
+    A single worker runs in the current thread; more workers run in
+    threads, each with its own database connection.
+
+    Returns:
+    - The elapsed seconds, the sorted latencies in seconds, the query
+      counts, the status codes and the errors raised.
+    """
+    lock = threading.Lock()
+    next_index = [0]
+    latencies = []
+    query_counts = []
+    status_codes = {}
+    errors = []
+
+    def worker():
+        while True:
+            with lock:
+                index = next_index[0]
+                next_index[0] += 1
+            if index >= requests:
+                return
+            path, body = build(index)
+            started = time.perf_counter()
+            try:
+                status_code, queries = transport.send(method, path, body)
+            except Exception as exc:
+                status_code, queries = None, None
+                with lock:
+                    errors.append(repr(exc))
+            latency = time.perf_counter() - started
+            with lock:
+                latencies.append(latency)
+                if queries is not None:
+                    query_counts.append(queries)
+                key = str(status_code)
+                status_codes[key] = status_codes.get(key, 0) + 1
+
+    def threaded_worker():
+        try:
+            worker()
+        finally:
+            connections.close_all()
+
+    started = time.perf_counter()
+    if concurrency == 1:
+        worker()
+    else:
+        threads = [
+            threading.Thread(target=threaded_worker)
+            for _ in range(concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    elapsed = time.perf_counter() - started
+    return elapsed, sorted(latencies), query_counts, status_codes, errors
+
+
+def endpoint_result(method, route, path, elapsed, latencies, query_counts,
+                    status_codes, errors):
+    failed = sum(
+        count for status_code, count in status_codes.items()
+        if status_code == 'None' or int(status_code) >= 400
+    )
+    return {
+        'method': method,
+        'route': route,
+        'path': path,
+        'requests': len(latencies),
+        'failed': failed,
+        'status_codes': status_codes,
+        'errors': errors[:10],
+        'throughput': len(latencies) / elapsed if elapsed else 0.0,
+        'latency_ms': {
+            'mean': sum(latencies) / len(latencies) * 1000,
+            'p50': percentile(latencies, 0.50) * 1000,
+            'p95': percentile(latencies, 0.95) * 1000,
+            'p99': percentile(latencies, 0.99) * 1000,
+            'max': latencies[-1] * 1000
+        },
+        'queries': {
+            'mean': sum(query_counts) / len(query_counts),
+            'max': max(query_counts)
+        } if query_counts else None
+    }
+
+
+def run_benchmark(token, requests, concurrency, prefix='BN', base_url=None,
+                  page_size=100, only=None):
+    """
+    Benchmark every vendor and purchase order endpoint.
+
+    Parameters:
+    - token (str): Access token authenticating the requests.
+    - requests (int): Number of requests sent to each endpoint.
+    - concurrency (int): Number of requests in flight at once.
+    - prefix (str): Prefix of the throwaway rows of the write endpoints.
+    - base_url (str): Optional. Server to send the requests to, instead of
+      the in-process test client. It must use the same database.
+    - page_size (int): page_size of the purchase order list requests.
+    - only (list): Optional. Only run the endpoints whose route contains
+      one of these strings.
+
+    Operations:
+    - Reads run first, then writes, so every read sees the same data.
+    - The throwaway rows are deleted afterwards, even after a failure.
+
+    Returns:
+    - A dict with the run's settings, the number of vendors and purchase
+      orders, a result per endpoint and the endpoints without a scenario.
+    """
+    started_at = timezone.now()
+    data = BenchData(prefix)
+    try:
+        data.create(requests)
+        scenarios = bench_requests(data, page_size)
+        selected = [
+            endpoint for endpoint in endpoints()
+            if endpoint in scenarios and (
+                not only or any(part in endpoint[1] for part in only)
+            )
+        ]
+        # Reads first, deletes last.
+        order = {'GET': 0, 'POST': 1, 'PUT': 1, 'DELETE': 2}
+        selected.sort(key=lambda endpoint: order[endpoint[0]])
+        transport = (
+            HttpTransport(token, base_url) if base_url
+            else ClientTransport(token)
+        )
+        vendor_count = VendorModel.objects.exclude(
+            vendor_code__startswith=prefix
+        ).count()
+        purchase_order_count = PurchaseOrderModel.objects.exclude(
+            vendor__vendor_code__startswith=prefix
+        ).count()
+
+        results = []
+        for method, route in selected:
+            build = scenarios[(method, route)]
+            results.append(
+                endpoint_result(
+                    method,
+                    route,
+                    build(0)[0],
+                    *run_endpoint(
+                        transport, method, build, requests, concurrency
+                    )
+                )
+            )
+    finally:
+        data.delete()
+
+    return {
+        'started_at': started_at.isoformat(),
+        'target': base_url or 'test client',
+        'requests': requests,
+        'concurrency': concurrency,
+        'vendors': vendor_count,
+        'purchase_orders': purchase_order_count,
+        'results': results,
+        'unbenchmarked': [
+            f'{method} {route}' for method, route in endpoints()
+            if (method, route) not in scenarios
+        ]
+    }
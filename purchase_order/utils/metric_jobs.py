@@ -0,0 +1,240 @@
+import logging
+import time
+import uuid
+from datetime import timedelta
+from django.conf import settings
+from django.db import OperationalError, transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+from purchase_order.models import VendorMetricJobModel
+from vendor.models import VendorModel
+from .performance_metric_function import update_vendor_metrics
+
+logger = logging.getLogger(__name__)
+
+
+def metrics_deferred():
+    """
+    Returns True when vendor metrics are recomputed by the metric worker
+    rather than inside the request.
+    """
+    return getattr(settings, 'VENDOR_METRICS_DEFERRED', False)
+
+
+def enqueue_vendor_metrics(vendor_codes):
+    """
+    Request the recomputation of the metrics of some vendors.
+
+    Parameters:
+    - vendor_codes (iterable): Vendor codes whose metrics changed.
+
+    Operations:
+    - Inserts one job per vendor with a single upsert. A vendor that
+      already has a pending job only gets its requested_at moved forward,
+      which tells a worker running the old job to leave it queued.
+    """
+    now = timezone.now()
+    VendorMetricJobModel.objects.bulk_create(
+        [
+            VendorMetricJobModel(
+                vendor_id=vendor_code,
+                enqueued_at=now,
+                requested_at=now,
+                available_at=now
+            )
+            for vendor_code in set(vendor_codes)
+        ],
+        update_conflicts=True,
+        unique_fields=['vendor'],
+        update_fields=['requested_at']
+    )
+
+
+def refresh_vendor_metrics(vendor_code):
+    """
+    Recompute a vendor's four performance metrics from its order stats
+    and save the changed ones with a single update.
+    """
+    update_vendor_metrics(VendorModel.objects.get(vendor_code=vendor_code))
+
+
+def retry_delay(attempts):
+    """
+    Returns how long a job waits after its nth failed attempt.
+    """
+    return timedelta(
+        seconds=min(
+            2 ** attempts,
+            getattr(settings, 'METRIC_WORKER_MAX_RETRY_DELAY', 300)
+        )
+    )
+
+
+def retry_locked(operation, on_retry=None):
+    """
+    Run an operation, again while the database rejects it as locked.
+    Writers holding the same tables at once are not failures of the
+    operation.
+
+    Parameters:
+    - operation (callable): The operation to run.
+    - on_retry (callable): Optional. Called before each retry.
+
+    Operations:
+    - Waits 1ms before the first retry and twice as long before each next
+      one, up to 100ms.
+
+    Returns:
+    - The result of the operation.
+
+    Raises:
+    - OperationalError: The operation failed for another reason, or was
+      still locked after DATABASE_LOCK_RETRY_SECONDS.
+    """
+    deadline = time.monotonic() + getattr(
+        settings, 'DATABASE_LOCK_RETRY_SECONDS', 5.0
+    )
+    delay = 0.001
+    while True:
+        try:
+            return operation()
+        except OperationalError as exc:
+            if 'locked' not in str(exc) or time.monotonic() >= deadline:
+                raise
+        if on_retry is not None:
+            on_retry()
+        time.sleep(delay)
+        delay = min(delay * 2, 0.1)
+
+
+def claim_metric_jobs(batch_size):
+    """
+    Claim a batch of due metric jobs, oldest first.
+
+    Operations:
+    - A single conditional update marks the due jobs with a new claim and
+      moves their available_at forward by METRIC_WORKER_CLAIM_SECONDS, so
+      that no other worker selects them. The jobs of a worker that dies
+      are claimed again once this lease expires.
+
+    Returns:
+    - The claimed jobs.
+    """
+    claim = uuid.uuid4().hex
+    now = timezone.now()
+    due = VendorMetricJobModel.objects.filter(
+        available_at__lte=now
+    ).order_by('available_at').values('vendor')[:batch_size]
+    lease = timedelta(
+        seconds=getattr(settings, 'METRIC_WORKER_CLAIM_SECONDS', 60)
+    )
+    retry_locked(
+        lambda: VendorMetricJobModel.objects.filter(
+            vendor__in=due,
+            available_at__lte=now
+        ).update(claimed_by=claim, available_at=now + lease)
+    )
+    return retry_locked(
+        lambda: list(
+            VendorMetricJobModel.objects.filter(
+                claimed_by=claim
+            ).order_by('enqueued_at')
+        )
+    )
+
+
+def metric_jobs_due():
+    """
+    Returns True when a metric job is waiting to be claimed.
+    """
+    return retry_locked(
+        VendorMetricJobModel.objects.filter(
+            available_at__lte=timezone.now()
+        ).exists
+    )
+
+
+def run_metric_job(job, claimed):
+    """
+    Recompute the metrics of a claimed job's vendor and delete the job in
+    one transaction, or release it when it was requested again meanwhile.
+
+    Returns:
+    - 1 when the job was deleted, 0 otherwise.
+    """
+    with transaction.atomic():
+        refresh_vendor_metrics(job.vendor_id)
+        deleted, _ = claimed.filter(requested_at=job.requested_at).delete()
+        if not deleted:
+            claimed.update(claimed_by='', available_at=timezone.now())
+    return deleted
+
+
+def run_metric_jobs(batch_size=None):
+    """
+    Claim and run one batch of due metric jobs, oldest first.
+
+    Parameters:
+    - batch_size (int): Optional. Maximum number of jobs to run, defaults
+      to METRIC_WORKER_BATCH_SIZE.
+
+    Operations:
+    - Each job recomputes its vendor's metrics and is deleted in its own
+      transaction. A job requested again in the meantime is released
+      instead, to run again with the next batch.
+    - A failing job is released with its error and retried after an
+      exponential backoff.
+
+    Returns:
+    - The number of jobs run and deleted.
+    """
+    if batch_size is None:
+        batch_size = getattr(settings, 'METRIC_WORKER_BATCH_SIZE', 100)
+    completed = 0
+    for job in claim_metric_jobs(batch_size):
+        claimed = VendorMetricJobModel.objects.filter(
+            vendor=job.vendor_id,
+            claimed_by=job.claimed_by
+        )
+        try:
+            completed += retry_locked(lambda: run_metric_job(job, claimed))
+        except Exception as exc:
+            logger.exception(
+                "Metric job of vendor %s failed", job.vendor_id
+            )
+            try:
+                retry_locked(
+                    lambda: claimed.update(
+                        claimed_by='',
+                        attempts=job.attempts + 1,
+                        last_error=repr(exc),
+                        available_at=(
+                            timezone.now() + retry_delay(job.attempts + 1)
+                        )
+                    )
+                )
+            except OperationalError:
+                # Claimed again once its lease expires
+                logger.exception(
+                    "Could not release the metric job of vendor %s",
+                    job.vendor_id
+                )
+    return completed
+
+
+def metric_queue_stats():
+    """
+    Returns the depth of the metric job queue and the age in seconds of
+    its oldest job, 0 when the queue is empty.
+    """
+    stats = VendorMetricJobModel.objects.aggregate(
+        depth=Count('vendor'),
+        oldest=Min('enqueued_at')
+    )
+    return {
+        'depth': stats['depth'],
+        'lag': (
+            (timezone.now() - stats['oldest']).total_seconds()
+            if stats['oldest'] is not None else 0.0
+        )
+    }
@@ -0,0 +1,152 @@
+import random
+import threading
+import time
+from datetime import timedelta
+from functools import partial
+from django.db import connections, transaction
+from django.utils import timezone
+from purchase_order.models import PurchaseOrderModel, VendorOrderStatsModel
+from vendor.models import VendorModel
+from .metric_jobs import retry_locked
+from .order_stats import order_stats_queryset, vendor_metrics
+from .performance_metric_function import update_vendor_metrics
+
+# Metrics touched by every update of the stress run.
+STRESS_METRIC_FIELDS = ['quality_rating_avg', 'average_response_time']
+
+
+def rate_and_acknowledge(po_number, quality_rating, response_hours):
+    """
+    Rate and acknowledge one purchase order and update its vendor's
+    metrics in one transaction, the way a PUT followed by an
+    acknowledgment would.
+    """
+    with transaction.atomic():
+        purchase_order = PurchaseOrderModel.objects.get(po_number=po_number)
+        purchase_order.quality_rating = quality_rating
+        purchase_order.acknowledgment_date = (
+            purchase_order.order_date + timedelta(hours=response_hours)
+        )
+        purchase_order.save()
+        update_vendor_metrics(purchase_order.vendor, STRESS_METRIC_FIELDS)
+
+
+def run_metric_stress(vendor_code, po_numbers, threads, seed=None):
+    """
+    Update the purchase orders of a vendor from several threads at once
+    and check that no update was lost.
+
+    Parameters:
+    - vendor_code (str): The vendor owning the purchase orders.
+    - po_numbers (list): Purchase orders to rate and acknowledge, split
+      between the threads.
+    - threads (int): Number of concurrent writers.
+    - seed (int): Optional. Seed of the random ratings and response times.
+
+    Operations:
+    - Each writer runs rate_and_acknowledge() on its share of the orders,
+      retrying a transaction the database rejected as locked with
+      retry_locked(). A writer still locked out when it gives up stops,
+      and its error is reported.
+    - The vendor's stats and metrics are then compared with the ones
+      aggregated from its purchase orders.
+
+    Returns:
+    - A dict with the number of updates, the elapsed seconds, updates per
+      second, retried transactions, errors, and the stats fields and
+      metrics that do not match their recomputed value.
+    """
+    rng = random.Random(seed)
+    work = [
+        (po_number, rng.randint(1, 5), rng.randint(1, 72))
+        for po_number in po_numbers
+    ]
+    shares = [work[index::threads] for index in range(threads)]
+    lock = threading.Lock()
+    outcome = {'retries': 0, 'errors': []}
+
+    def retried():
+        with lock:
+            outcome['retries'] += 1
+
+    def writer(share):
+        try:
+            for po_number, quality_rating, response_hours in share:
+                retry_locked(
+                    partial(
+                        rate_and_acknowledge,
+                        po_number, quality_rating, response_hours
+                    ),
+                    on_retry=retried
+                )
+        except Exception as exc:
+            with lock:
+                outcome['errors'].append(repr(exc))
+        finally:
+            connections.close_all()
+
+    workers = [
+        threading.Thread(target=writer, args=(share,)) for share in shares
+    ]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+
+    stats = VendorOrderStatsModel.objects.get(vendor=vendor_code)
+    expected = order_stats_queryset([vendor_code]).get()
+    lost_stats = [
+        field for field in ('rated_count', 'acknowledged_count')
+        if getattr(stats, field) != expected[field]
+    ]
+    vendor = VendorModel.objects.get(vendor_code=vendor_code)
+    metrics = vendor_metrics(stats)
+    lost_metrics = [
+        field for field in STRESS_METRIC_FIELDS
+        if abs(getattr(vendor, field) - metrics[field]) > 1e-9
+    ]
+    return {
+        'updates': len(work),
+        'elapsed': elapsed,
+        'throughput': len(work) / elapsed if elapsed else 0.0,
+        'retries': outcome['retries'],
+        'errors': outcome['errors'],
+        'lost_stats': lost_stats,
+        'lost_metrics': lost_metrics
+    }
+
+
+def create_stress_orders(vendor_code, count):
+    """
+    Create a vendor with count pending purchase orders for a stress run.
+
+    Returns:
+    - The PO numbers of the created orders.
+    """
+    now = timezone.now()
+    vendor = VendorModel.objects.create(
+        vendor_code=vendor_code,
+        name=f'Stress {vendor_code}',
+        contact_details='-',
+        address='-'
+    )
+    po_numbers = [f'{vendor_code}-{number:06}' for number in range(count)]
+    PurchaseOrderModel.objects.bulk_create(
+        [
+            PurchaseOrderModel(
+                po_number=po_number,
+                vendor=vendor,
+                order_date=now,
+                delivery_date=now + timedelta(days=7),
+                items={'item': 'Stress Item'},
+                quantity=1,
+                status='pending',
+                issue_date=now
+            )
+            for po_number in po_numbers
+        ]
+    )
+    VendorOrderStatsModel.objects.create(vendor=vendor, total_count=count)
+    return po_numbers
@@ -0,0 +1,234 @@
+from django.db.models import (
+    Case, Count, DurationField, ExpressionWrapper, F, FloatField, OuterRef,
+    Q, Subquery, Sum, Value, When
+)
+from django.db.models.functions import Cast
+from purchase_order.models import PurchaseOrderModel, VendorOrderStatsModel
+
+STATS_FIELDS = [
+    'total_count',
+    'completed_count',
+    'on_time_count',
+    'rated_count',
+    'acknowledged_count',
+    'quality_rating_sum',
+    'response_time_sum'
+]
+
+
+def order_contribution(values):
+    """
+    Returns what a single purchase order adds to its vendor's stats.
+
+    Parameters:
+    - values (dict): Field values of the purchase order, as given by its
+      tracker: order_date, delivery_date, expected_delivery_date, status,
+      quality_rating and acknowledgment_date.
+    """
+    completed = values['status'] == "completed"
+    expected_delivery_date = values['expected_delivery_date']
+    quality_rating = values['quality_rating']
+    acknowledgment_date = values['acknowledgment_date']
+    return {
+        'total_count': 1,
+        'completed_count': int(completed),
+        'on_time_count': int(
+            completed and
+            expected_delivery_date is not None and
+            values['delivery_date'] <= expected_delivery_date
+        ),
+        'rated_count': int(quality_rating is not None),
+        'acknowledged_count': int(acknowledgment_date is not None),
+        'quality_rating_sum': (
+            float(quality_rating) if quality_rating is not None else 0.0
+        ),
+        'response_time_sum': (
+            (acknowledgment_date - values['order_date']).total_seconds() / 3600
+            if acknowledgment_date is not None else 0.0
+        )
+    }
+
+
+def add_contribution(deltas, vendor_id, contribution, sign=1):
+    """
+    Add (or with sign=-1 subtract) a contribution to the per-vendor deltas.
+    """
+    vendor_deltas = deltas.setdefault(
+        vendor_id,
+        dict.fromkeys(STATS_FIELDS, 0)
+    )
+    for field, value in contribution.items():
+        vendor_deltas[field] += sign * value
+
+
+def apply_order_stats(deltas, rebuild_missing=True):
+    """
+    Apply per-vendor deltas to the stats table.
+
+    Parameters:
+    - deltas (dict): Vendor code to a dict of STATS_FIELDS increments.
+    - rebuild_missing (bool): Rebuild the stats of vendors that have no
+      stats row yet from their purchase orders.
+
+    Each vendor is updated with a single UPDATE of F() increments, so
+    concurrent writers never overwrite each other's counts.
+    """
+    missing = []
+    for vendor_id, vendor_deltas in deltas.items():
+        changes = {
+            field: F(field) + value
+            for field, value in vendor_deltas.items()
+            if value
+        }
+        if not changes:
+            continue
+        updated = VendorOrderStatsModel.objects.filter(
+            vendor=vendor_id
+        ).update(**changes)
+        if not updated:
+            missing.append(vendor_id)
+    if missing and rebuild_missing:
+        rebuild_order_stats(missing)
+
+
+def order_stats_queryset(vendor_codes):
+    """
+    Returns the grouped query computing the stats of a set of vendors,
+    one row per vendor with at least one purchase order.
+    """
+    completed = Q(status="completed")
+    acknowledged = Q(acknowledgment_date__isnull=False)
+    return PurchaseOrderModel.objects.filter(
+        vendor__in=vendor_codes
+    ).values('vendor').annotate(
+        total_count=Count('po_number'),
+        completed_count=Count('po_number', filter=completed),
+        on_time_count=Count(
+            'po_number',
+            filter=completed & Q(
+                delivery_date__lte=F('expected_delivery_date')
+            )
+        ),
+        rated_count=Count('quality_rating'),
+        acknowledged_count=Count('po_number', filter=acknowledged),
+        quality_rating_sum=Sum('quality_rating'),
+        response_time_sum=Sum(
+            ExpressionWrapper(
+                F('acknowledgment_date') - F('order_date'),
+                output_field=DurationField()
+            ),
+            filter=acknowledged
+        )
+    )
+
+
+def rebuild_order_stats(vendor_codes):
+    """
+    Rebuild the stats of a set of vendors from their purchase orders.
+
+    Parameters:
+    - vendor_codes (list): Vendor codes of the vendors to rebuild.
+
+    Operations:
+    - Aggregates the purchase orders of all the vendors with a single
+      grouped query using conditional counts and sums.
+    - Inserts or overwrites the stats rows with one bulk upsert.
+
+    Returns:
+    - The rebuilt VendorOrderStatsModel instances, in the order of vendor_codes.
+    """
+    aggregates = order_stats_queryset(vendor_codes)
+    aggregates = {row.pop('vendor'): row for row in aggregates}
+
+    stats = []
+    for vendor_code in vendor_codes:
+        row = aggregates.get(vendor_code, {})
+        response_time_sum = row.get('response_time_sum')
+        stats.append(
+            VendorOrderStatsModel(
+                vendor_id=vendor_code,
+                total_count=row.get('total_count', 0),
+                completed_count=row.get('completed_count', 0),
+                on_time_count=row.get('on_time_count', 0),
+                rated_count=row.get('rated_count', 0),
+                acknowledged_count=row.get('acknowledged_count', 0),
+                quality_rating_sum=row.get('quality_rating_sum') or 0.0,
+                response_time_sum=(
+                    response_time_sum.total_seconds() / 3600
+                    if response_time_sum is not None else 0.0
+                )
+            )
+        )
+    VendorOrderStatsModel.objects.bulk_create(
+        stats,
+        update_conflicts=True,
+        unique_fields=['vendor'],
+        update_fields=STATS_FIELDS
+    )
+    return stats
+
+
+def get_order_stats(vendor_id):
+    """
+    Returns the stats row of a vendor, rebuilding it when it does not exist yet.
+    """
+    stats = VendorOrderStatsModel.objects.filter(vendor=vendor_id).first()
+    if stats is None:
+        stats = rebuild_order_stats([vendor_id])[0]
+    return stats
+
+
+def vendor_metrics(stats):
+    """
+    Derive the four vendor performance metrics from a stats row.
+    """
+    return {
+        'on_time_delivery_rate': (
+            stats.on_time_count / stats.completed_count
+            if stats.completed_count else 0.0
+        ),
+        'quality_rating_avg': (
+            stats.quality_rating_sum / stats.rated_count
+            if stats.rated_count else 0.0
+        ),
+        'average_response_time': (
+            stats.response_time_sum / stats.acknowledged_count
+            if stats.acknowledged_count else 0.0
+        ),
+        'fulfillment_rate': (
+            stats.completed_count / stats.total_count
+            if stats.total_count else 0.0
+        )
+    }
+
+
+# Numerator and denominator of each metric in the stats table.
+METRIC_RATIOS = {
+    'on_time_delivery_rate': ('on_time_count', 'completed_count'),
+    'quality_rating_avg': ('quality_rating_sum', 'rated_count'),
+    'average_response_time': ('response_time_sum', 'acknowledged_count'),
+    'fulfillment_rate': ('completed_count', 'total_count')
+}
+
+
+def metric_expression(field):
+    """
+    Returns a SQL expression computing one metric of the outer vendor
+    from its stats row, the database counterpart of vendor_metrics().
+
+    The expression reads the stats as of the statement that uses it, so
+    an UPDATE setting a metric to it never writes a ratio computed from
+    counts another writer has since changed.
+    """
+    numerator, denominator = METRIC_RATIOS[field]
+    ratio = Case(
+        When(**{denominator: 0}, then=Value(0.0)),
+        default=Cast(numerator, FloatField()) / Cast(denominator, FloatField()),
+        output_field=FloatField()
+    )
+    return Subquery(
+        VendorOrderStatsModel.objects.filter(
+            vendor=OuterRef('pk')
+        ).values(value=ratio)[:1],
+        output_field=FloatField()
+    )
@@ -1,8 +1,70 @@
-from purchase_order.models import PurchaseOrderModel
+from purchase_order.models import VendorOrderStatsModel
+from vendor.cache import invalidate_performance
+from vendor.history import record_performance
+from vendor.models import VendorModel
+from django.db.models import Q
 from django.utils import timezone
+from vendor_management_system.db_router import use_primary
+from vendor_management_system.metrics import timed_metric_function
+from .order_stats import (
+    metric_expression, rebuild_order_stats, vendor_metrics
+)
+
+VENDOR_METRIC_FIELDS = [
+    'on_time_delivery_rate',
+    'quality_rating_avg',
+    'average_response_time',
+    'fulfillment_rate'
+]
+
+
+@timed_metric_function
+@use_primary()
+def update_vendor_metrics(vendor, fields=VENDOR_METRIC_FIELDS):
+    """
+    Recompute some of a vendor's performance metrics and write them with
+    a single atomic UPDATE.
 
-utc = timezone.now()
+    Parameters:
+    - vendor (VendorModel): The vendor whose metrics are to be updated.
+    - fields (list): Optional. The metrics affected by the purchase order
+      event, all four by default.
 
+    Operations:
+    - Sets the metrics and updated_at with one UPDATE whose values are
+      computed by the database from the vendor's order stats, so no
+      concurrent writer's counts are lost and no row lock is held while
+      Python code runs.
+    - The UPDATE only matches when one of the metrics actually changes.
+      Nothing is written then, otherwise the new metrics are loaded back
+      into the vendor and a single history snapshot is recorded.
+    - A missing stats row is rebuilt from the vendor's purchase orders.
+
+    Returns:
+    - The list of metrics written, empty when none changed.
+    """
+    expressions = {field: metric_expression(field) for field in fields}
+    changed = Q()
+    for field, expression in expressions.items():
+        changed |= Q(**{f'{field}__isnull': True}) | ~Q(**{field: expression})
+    vendors = VendorModel.objects.filter(pk=vendor.pk).filter(changed)
+
+    updated = vendors.update(updated_at=timezone.now(), **expressions)
+    if not updated:
+        if VendorOrderStatsModel.objects.filter(vendor=vendor.pk).exists():
+            return []
+        rebuild_order_stats([vendor.pk])
+        updated = vendors.update(updated_at=timezone.now(), **expressions)
+        if not updated:
+            return []
+
+    vendor.refresh_from_db(fields=list(fields) + ['updated_at'])
+    record_performance(vendor)
+    return list(fields)
+
+
+@timed_metric_function
+@use_primary()
 def calculate_avg_response_time(self, purchase_order):
     """
     Calculate the average response time for a
@@ -14,30 +76,55 @@ def calculate_avg_response_time(self, purchase_order):
 
     Operations:
     - Retrieves the vendor associated with the purchase order.
-    - Calculates the response time in hours between the
-      order date and the acknowledgment date.
-    - Updates the vendor's average response time based on
-      the new response time and the count of acknowledged orders.
+    - Reads the vendor's acknowledged order count and the sum of their
+      response times in hours from the vendor's order stats.
+    - Updates the vendor's average response time to their ratio.
     """
 
-    vendor1 = purchase_order.vendor
-    order_datetime = purchase_order.order_date
-    ack_datetime = purchase_order.acknowledgment_date
-    ack_orders_count = PurchaseOrderModel.objects.filter(
-        acknowledgment_date__isnull=False
-    ).count()
-    response_time_seconds = ((ack_datetime - order_datetime).total_seconds()) / 3600
-    avg_response = vendor1.average_response_time
+    update_vendor_metrics(purchase_order.vendor, ['average_response_time'])
+
 
-    if avg_response is not None:
-        new_avg_response = (
-            avg_response * (ack_orders_count - 1) +
-            response_time_seconds
-        ) / ack_orders_count
-        vendor1.average_response_time = new_avg_response
-        vendor1.save()
+@timed_metric_function
+@use_primary()
+def calculate_bulk_avg_response_time(self, purchase_orders):
+    """
+    Calculate the average response time of every vendor
+    affected by a batch of newly acknowledged purchase orders.
+
+    Parameters:
+    - purchase_orders (list): The acknowledged purchase order instances.
 
+    Operations:
+    - Rebuilds the order stats of the affected vendors that have none.
+    - Updates each vendor's average response time with one atomic
+      UPDATE, so a single history snapshot is written per vendor.
+    """
 
+    vendor_codes = {
+        purchase_order.vendor_id for purchase_order in purchase_orders
+    }
+    if not vendor_codes:
+        return
+
+    existing = set(
+        VendorOrderStatsModel.objects.filter(
+            vendor__in=vendor_codes
+        ).values_list('vendor', flat=True)
+    )
+    missing = [
+        vendor_code for vendor_code in vendor_codes
+        if vendor_code not in existing
+    ]
+    if missing:
+        rebuild_order_stats(missing)
+    vendors = VendorModel.objects.in_bulk(vendor_codes)
+
+    for vendor1 in vendors.values():
+        update_vendor_metrics(vendor1, ['average_response_time'])
+
+
+@timed_metric_function
+@use_primary()
 def fulfillment_rate(self, purchase_order):
     """
     Calculate the fulfillment rate for a vendor 
@@ -49,23 +136,17 @@ def fulfillment_rate(self, purchase_order):
 
     Operations:
     - Retrieves the vendor associated with the purchase order.
-    - Counts the number of completed orders and the total 
-      number of orders by the vendor.
+    - Reads the number of completed orders and the total 
+      number of orders by the vendor from the vendor's order stats.
     - Updates the vendor's fulfillment rate based on the ratio of 
       completed orders to total orders.
     """
 
-    vendor_id = purchase_order.vendor
-    completed_order_count = PurchaseOrderModel.objects.filter(
-        vendor=vendor_id, status="completed"
-    ).count()
-    total_order_by_vendor_count = PurchaseOrderModel.objects.filter(
-        vendor=vendor_id
-    ).count()
-    vendor_id.fulfillment_rate = completed_order_count / total_order_by_vendor_count
-    vendor_id.save()
+    update_vendor_metrics(purchase_order.vendor, ['fulfillment_rate'])
 
 
+@timed_metric_function
+@use_primary()
 def on_time_delivery_rate(self, purchase_order, expected_delivery_date):
     """
     Calculate the on-time delivery rate for a vendor based on the delivery dates of their purchase orders.
@@ -73,53 +154,77 @@ def on_time_delivery_rate(self, purchase_order, expected_delivery_date):
     Parameters:
     - purchase_order (PurchaseOrderModel): The purchase order instance for which the vendor's on-time delivery rate is to be calculated.
     - expected_delivery_date (datetime): The expected delivery date for the purchase order.
+      Already counted in the vendor's order stats when the order was completed.
 
     Operations:
     - Retrieves the vendor associated with the purchase order.
-    - Checks if the current delivery date is on or before the expected delivery date.
-    - Updates the vendor's on-time delivery rate based on whether the order was delivered on time.
+    - Reads the number of completed orders delivered on or before their expected
+      delivery date, and of all completed orders, from the vendor's order stats.
+    - Updates the vendor's on-time delivery rate to their ratio.
     """
 
-    vendor_id = purchase_order.vendor
-    current_deliver_date = purchase_order.delivery_date
-    prev_on_time_delivery_rate = vendor_id.on_time_delivery_rate
-    total_completed_order = PurchaseOrderModel.objects.filter(
-        vendor=vendor_id, status="completed"
-    ).count()
-    if current_deliver_date <= expected_delivery_date:
-        new_on_time_delivery_rate = (
-            prev_on_time_delivery_rate * (total_completed_order - 1) + 1
-        ) / total_completed_order
-        vendor_id.on_time_delivery_rate = new_on_time_delivery_rate
-    vendor_id.save()
+    update_vendor_metrics(purchase_order.vendor, ['on_time_delivery_rate'])
 
 
+@timed_metric_function
+@use_primary()
 def quality_rating_avg(self, purchase_order,prev_quality_rate):
     """
     Calculate the average quality rating for a vendor based on the quality ratings of their purchase orders.
 
     Parameters:
     - purchase_order (PurchaseOrderModel): The purchase order instance for which the vendor's average quality rating is to be calculated.
-    - prev_quality_rate (int): The previous average quality rating for the vendor.
+    - prev_quality_rate (int): The previous quality rating of the purchase order.
+      Already replaced in the vendor's order stats when the order was saved.
 
     Operations:
     - Retrieves the vendor associated with the purchase order.
-    - Calculates the new average quality rating based on the current quality rating and the previous average.
+    - Reads the number of rated orders and the sum of their ratings from the vendor's order stats.
     - Updates the vendor's average quality rating.
     """
 
-    vendor_id = purchase_order.vendor
-    quality_rate = purchase_order.quality_rating
-    prev_quality_avg = vendor_id.quality_rating_avg
-    total_quality_rate = PurchaseOrderModel.objects.filter(
-        vendor=vendor_id, quality_rating__isnull=False
-    ).count()
-    if quality_rate is not None and prev_quality_rate is None:
-        new_total_quality_rate = quality_rate + prev_quality_avg * (total_quality_rate-1)
-        vendor_id.quality_rating_avg = new_total_quality_rate / total_quality_rate
-    elif quality_rate is not None and prev_quality_rate is not None:
-        new_total_quality_rate=quality_rate + (
-            prev_quality_avg * ( total_quality_rate) - prev_quality_rate
+    update_vendor_metrics(purchase_order.vendor, ['quality_rating_avg'])
+
+
+@timed_metric_function
+@use_primary()
+def recompute_vendor_metrics(vendor_codes):
+    """
+    Rebuild the order stats and performance metrics of a set of vendors
+    from their purchase orders.
+
+    Parameters:
+    - vendor_codes (list): Vendor codes of the vendors to recompute.
+
+    Operations:
+    - Rebuilds the vendors' order stats with a single grouped query
+      using conditional counts and sums.
+    - On-time delivery rate: completed orders delivered on or before their
+      expected delivery date over all completed orders.
+    - Quality rating average: average of the given quality ratings.
+    - Average response time: average hours between order and acknowledgment.
+    - Fulfillment rate: completed orders over all orders.
+    - Vendors without purchase orders are reset to 0.
+    - Writes the metrics back with bulk_update, which does not send
+      post_save, so no history snapshots are recorded, and drops the
+      vendors' cached performance payloads.
+
+    Returns:
+    - The number of vendor rows updated.
+    """
+
+    updated_at = timezone.now()
+    vendors = [
+        VendorModel(
+            vendor_code=vendor_stats.vendor_id,
+            updated_at=updated_at,
+            **vendor_metrics(vendor_stats)
         )
-        vendor_id.quality_rating_avg = new_total_quality_rate / total_quality_rate
-    vendor_id.save()
+        for vendor_stats in rebuild_order_stats(vendor_codes)
+    ]
+    updated_count = VendorModel.objects.bulk_update(
+        vendors,
+        VENDOR_METRIC_FIELDS + ['updated_at']
+    )
+    invalidate_performance(vendor_codes)
+    return updated_count
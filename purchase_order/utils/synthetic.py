@@ -0,0 +1,143 @@
+import random
+from datetime import timedelta
+from django.db import transaction
+from django.utils import timezone
+from purchase_order.models import PurchaseOrderModel
+from vendor.models import VendorModel
+from .performance_metric_function import recompute_vendor_metrics
+
+# Longest vendor code prefix leaving room for a 6 digit vendor number.
+MAX_PREFIX_LENGTH = 3
+
+
+def synthetic_vendor_code(prefix, number):
+    return f'{prefix}{number:06}'
+
+
+def vendor_profile(rng):
+    """
+    Draw the traits the purchase orders of a synthetic vendor follow: most
+    vendors are reliable, a few are not.
+    """
+    return {
+        'on_time': rng.betavariate(8, 2),
+        'completion': rng.betavariate(6, 2),
+        'quality': min(max(rng.gauss(3.8, 0.6), 1.0), 5.0),
+        'response_hours': rng.lognormvariate(2.5, 0.6)
+    }
+
+
+def synthetic_order(rng, po_number, vendor_code, profile, now):
+    """
+    Build one purchase order of a vendor following its profile.
+
+    - The order was placed within the last year and planned for delivery
+      3 to 21 days later.
+    - 90% of the orders are acknowledged, after a log-normal response
+      time around the vendor's typical one.
+    - Acknowledged orders are completed with the vendor's completion
+      probability, 5% are canceled and the others still pending.
+    - Completed orders are delivered on time with the vendor's on-time
+      probability, otherwise up to a week late, and 80% are rated 1 to 5
+      around the vendor's quality.
+    """
+    order_date = now - timedelta(seconds=rng.uniform(0, 365 * 24 * 3600))
+    planned_delivery = order_date + timedelta(days=rng.randint(3, 21))
+    order = PurchaseOrderModel(
+        po_number=po_number,
+        vendor_id=vendor_code,
+        order_date=order_date,
+        delivery_date=planned_delivery,
+        items={'item': f'Item {rng.randint(1, 500)}'},
+        quantity=rng.randint(1, 100),
+        status='pending'
+    )
+    if rng.random() >= 0.9:
+        return order
+    order.acknowledgment_date = order_date + timedelta(
+        hours=rng.lognormvariate(0, 0.8) * profile['response_hours']
+    )
+
+    outcome = rng.random()
+    if outcome < profile['completion']:
+        order.status = 'completed'
+        order.expected_delivery_date = planned_delivery
+        if rng.random() < profile['on_time']:
+            order.delivery_date = planned_delivery - timedelta(
+                days=rng.randint(0, 2)
+            )
+        else:
+            order.delivery_date = planned_delivery + timedelta(
+                days=rng.randint(1, 7)
+            )
+        if rng.random() < 0.8:
+            order.quality_rating = round(
+                min(max(rng.gauss(profile['quality'], 0.7), 1.0), 5.0)
+            )
+    elif outcome < profile['completion'] + 0.05:
+        order.status = 'canceled'
+    return order
+
+
+def seed_synthetic(vendors, orders, prefix='SYN', seed=None, batch_size=5000):
+    """
+    Generate synthetic vendors and purchase orders with bulk inserts.
+
+    Parameters:
+    - vendors (int): Number of vendors created.
+    - orders (int): Number of purchase orders created.
+    - prefix (str): Prefix of the vendor codes and PO numbers.
+    - seed (int): Optional. Seed of the generator, for repeatable data sets.
+    - batch_size (int): Rows inserted per query.
+
+    Operations:
+    - Orders are spread over the vendors with a long tail: a few vendors
+      hold many orders, most hold a few.
+    - Each batch of orders is inserted in its own transaction.
+    - The order stats and performance metrics of the vendors are then
+      rebuilt from their orders.
+
+    Returns:
+    - The vendor codes of the created vendors.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    vendor_codes = [
+        synthetic_vendor_code(prefix, number) for number in range(vendors)
+    ]
+    profiles = [vendor_profile(rng) for _ in vendor_codes]
+    for start in range(0, vendors, batch_size):
+        VendorModel.objects.bulk_create(
+            [
+                VendorModel(
+                    vendor_code=vendor_code,
+                    name=f'Synthetic vendor {vendor_code}',
+                    contact_details=f'{vendor_code.lower()}@example.com',
+                    address=f'{rng.randint(1, 999)} Synthetic Street'
+                )
+                for vendor_code in vendor_codes[start:start + batch_size]
+            ]
+        )
+
+    weights = [1 / (rank + 1) ** 0.8 for rank in range(vendors)]
+    owners = rng.choices(range(vendors), weights=weights, k=orders)
+    for start in range(0, orders, batch_size):
+        with transaction.atomic():
+            PurchaseOrderModel.objects.bulk_create(
+                [
+                    synthetic_order(
+                        rng,
+                        f'{prefix}-PO-{number:09}',
+                        vendor_codes[owner],
+                        profiles[owner],
+                        now
+                    )
+                    for number, owner in enumerate(
+                        owners[start:start + batch_size], start
+                    )
+                ]
+            )
+
+    for start in range(0, vendors, batch_size):
+        recompute_vendor_metrics(vendor_codes[start:start + batch_size])
+    return vendor_codes
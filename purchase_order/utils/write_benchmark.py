@@ -0,0 +1,206 @@
+"""
+Concurrent write benchmark of the SQLite connection settings.
+
+Each profile runs on a scratch SQLite file of its own: the schema is
+migrated and vendors and purchase orders are created, then concurrent
+workers acknowledge orders through the acknowledge endpoint and rate
+other, acknowledged, orders through the purchase order update endpoint.
+The configured database is left untouched.
+"""
+import os
+import tempfile
+from contextlib import contextmanager
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+from purchase_order.models import PurchaseOrderModel
+from vendor.models import VendorModel
+from .benchmark import ClientTransport, endpoint_result, run_endpoint
+from .performance_metric_function import recompute_vendor_metrics
+
+# Django's SQLite defaults: rollback journal and deferred transactions.
+DEFAULT_PROFILE = {
+    'SQLITE_PRAGMAS': {},
+    'SQLITE_JOURNAL_MODE': 'DELETE',
+    'SQLITE_TRANSACTION_MODE': None
+}
+
+
+def write_profiles():
+    """
+    Returns the settings of the compared profiles: Django's defaults and
+    the configured SQLITE_PRAGMAS, SQLITE_JOURNAL_MODE and
+    SQLITE_TRANSACTION_MODE. The scratch files are not kept, so the
+    configured profile uses WAL when no journal mode is configured.
+    """
+    return {
+        'default': DEFAULT_PROFILE,
+        'configured': {
+            'SQLITE_PRAGMAS': getattr(settings, 'SQLITE_PRAGMAS', {}),
+            'SQLITE_JOURNAL_MODE': (
+                getattr(settings, 'SQLITE_JOURNAL_MODE', None) or 'WAL'
+            ),
+            'SQLITE_TRANSACTION_MODE': getattr(
+                settings, 'SQLITE_TRANSACTION_MODE', None
+            )
+        }
+    }
+
+
+@contextmanager
+def scratch_database(path):
+    """
+    Point the default database at a new SQLite file and migrate it.
+    """
+    connections.close_all()
+    settings_dict = connections[DEFAULT_DB_ALIAS].settings_dict
+    name = settings_dict['NAME']
+    settings_dict['NAME'] = path
+    try:
+        call_command('migrate', verbosity=0, interactive=False)
+        yield
+    finally:
+        connections.close_all()
+        settings_dict['NAME'] = name
+
+
+def create_write_targets(orders, vendors=10):
+    """
+    Create vendors with purchase orders to acknowledge and acknowledged
+    purchase orders to rate, spread over the vendors.
+
+    Returns:
+    - The PO numbers of the orders to acknowledge and of the orders to rate.
+    """
+    now = timezone.now()
+    vendor_codes = [f'WB{number:06}' for number in range(vendors)]
+    VendorModel.objects.bulk_create(
+        [
+            VendorModel(
+                vendor_code=vendor_code,
+                name=f'Write benchmark vendor {vendor_code}',
+                contact_details=f'{vendor_code.lower()}@example.com',
+                address='1 Benchmark Street'
+            )
+            for vendor_code in vendor_codes
+        ]
+    )
+    to_acknowledge = [f'WB-AC-{number:09}' for number in range(orders)]
+    to_rate = [f'WB-RT-{number:09}' for number in range(orders)]
+    acknowledged = now - timedelta(days=9)
+    PurchaseOrderModel.objects.bulk_create(
+        [
+            PurchaseOrderModel(
+                po_number=po_number,
+                vendor_id=vendor_codes[number % vendors],
+                order_date=now - timedelta(days=10),
+                delivery_date=now + timedelta(days=5),
+                acknowledgment_date=acknowledgment_date,
+                items={'item': 'Benchmark item'},
+                quantity=1,
+                status='pending'
+            )
+            for po_numbers, acknowledgment_date in [
+                (to_acknowledge, None),
+                (to_rate, acknowledged)
+            ]
+            for number, po_number in enumerate(po_numbers)
+        ]
+    )
+    recompute_vendor_metrics(vendor_codes)
+    return to_acknowledge, to_rate
+
+
+def run_profile(name, profile, orders, concurrency, directory):
+    """
+    Run the write workload with the settings of one profile.
+
+    Returns:
+    - A dict with the profile's settings, the journal mode in effect, the
+      result of each endpoint and the successful writes per second.
+    """
+    path = os.path.join(directory, f'{name}.sqlite3')
+    with override_settings(**profile), scratch_database(path):
+        user = get_user_model().objects.create_user(username='write-bench')
+        to_acknowledge, to_rate = create_write_targets(orders)
+        transport = ClientTransport(
+            str(RefreshToken.for_user(user).access_token)
+        )
+        scenarios = [
+            (
+                'POST',
+                'api/purchase_orders/<str:pk>/acknowledge/',
+                lambda index: (
+                    f'/api/purchase_orders/{to_acknowledge[index]}/'
+                    'acknowledge/',
+                    None
+                )
+            ),
+            (
+                'PUT',
+                'api/purchase_orders/<str:pk>/',
+                lambda index: (
+                    f'/api/purchase_orders/{to_rate[index]}/',
+                    {'quality_rating': index % 5 + 1}
+                )
+            )
+        ]
+        results = [
+            endpoint_result(
+                method,
+                route,
+                build(0)[0],
+                *run_endpoint(transport, method, build, orders, concurrency)
+            )
+            for method, route, build in scenarios
+        ]
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            journal_mode = cursor.fetchone()[0]
+
+    elapsed = sum(result['requests'] / result['throughput'] for result in results)
+    written = sum(result['requests'] - result['failed'] for result in results)
+    return {
+        'profile': name,
+        'pragmas': profile['SQLITE_PRAGMAS'],
+        'transaction_mode': profile['SQLITE_TRANSACTION_MODE'] or 'DEFERRED',
+        'journal_mode': journal_mode,
+        'results': results,
+        'writes_per_second': written / elapsed if elapsed else 0.0
+    }
+
+
+def run_write_benchmark(orders, concurrency):
+    """
+    Compare the write throughput of Django's SQLite defaults and of the
+    configured pragmas and transaction mode.
+
+    Parameters:
+    - orders (int): Purchase orders acknowledged, and rated, per profile.
+    - concurrency (int): Number of requests in flight at once.
+
+    Returns:
+    - A dict with the run's settings, a result per profile and the ratio
+      of the configured profile's write throughput to the default one's.
+    """
+    started_at = timezone.now()
+    with tempfile.TemporaryDirectory() as directory:
+        profiles = [
+            run_profile(name, profile, orders, concurrency, directory)
+            for name, profile in write_profiles().items()
+        ]
+    baseline = profiles[0]['writes_per_second']
+    return {
+        'started_at': started_at.isoformat(),
+        'orders': orders,
+        'concurrency': concurrency,
+        'profiles': profiles,
+        'speedup': (
+            profiles[1]['writes_per_second'] / baseline if baseline else None
+        )
+    }
@@ -1,5 +1,8 @@
 from datetime import datetime, timedelta, date
 from django.utils import timezone
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import render
 from rest_framework import status
 from rest_framework.views import APIView
@@ -8,46 +11,71 @@ from rest_framework.permissions import IsAuthenticated
 from.models import PurchaseOrderModel
 from vendor.models import *
 from.serializers import *
+from.filters import filter_purchase_orders
+from.pagination import PurchaseOrderCursorPagination
+from.renderers import *
+from.utils.metric_jobs import enqueue_vendor_metrics, metrics_deferred
+from.utils.order_stats import add_contribution, apply_order_stats
+from vendor_management_system.async_views import AsyncAPIView
+from vendor_management_system.conditional import (
+    has_conditional_headers, not_modified_response, set_validators
+)
+from vendor_management_system.sparse_fields import (
+    sparse_fields, sparse_queryset, sparse_representation
+)
 from.utils.performance_metric_function import *
 
-# Constants
-utc = timezone.now()
 
 class PurchaseOrderListAPIView(APIView):
     """
     API View for listing and creating purchase orders.
     """
     permission_classes = [IsAuthenticated]
+    replica_reads = True
 
     def get(self, request):
 
         """
-        Retrieve all purchase orders with a option to
-        filter the orders by vendor.
+        Retrieve purchase orders one page at a time with a option to
+        filter the orders by vendor, status and issue date.
         
         Parameters:
         - vendor (str): Optional. The ID of the vendor whose purchase orders to retrieve.
+        - status (str): Optional. Only orders with this status.
+        - from (date/datetime): Optional. Only orders issued at or after this time.
+        - to (date/datetime): Optional. Only orders issued before this time.
+        - cursor (str): Optional. The `next` cursor returned by the previous page.
+        - page_size (int): Optional. Number of orders per page, capped by
+          PURCHASE_ORDER_MAX_PAGE_SIZE.
+        - fields (str): Optional. Comma separated fields to return, e.g.
+          `status,delivery_date`. Only their columns are read.
+        - exclude (str): Optional. Comma separated fields to leave out.
         
         Returns:
-        - List of purchase orders.
+        - 200 OK: A page of purchase orders ordered by issue date and PO number,
+          along with the link to the next page.
+        - 400 Bad Request: A date filter, fields or exclude is invalid.
+        - 404 Not Found: The cursor is invalid.
         """
 
-        try:
-            vendor_id = request.query_params.get('vendor')
-        except PurchaseOrderModel.DoesNotExist:
-            return Response(
-                {
-                    'error':'Purchase order with this vendor does not exist'
-                },
-                status=status.HTTP_404_NOT_FOUND
-            )
-        queryset = PurchaseOrderModel.objects.all()
-
-        if vendor_id:
-            queryset = queryset.filter(vendor=vendor_id)
-        serializer = PurchaseOrderSerializer(queryset, many=True)
-        return Response(serializer.data,status=status.HTTP_200_OK)
+        fields = sparse_fields(request.query_params, PurchaseOrderSerializer)
+        queryset = filter_purchase_orders(
+            PurchaseOrderModel.objects.all(),
+            request.query_params
+        )
+        # The cursor is built from the ordering columns.
+        queryset = sparse_queryset(
+            queryset,
+            PurchaseOrderSerializer,
+            fields,
+            PurchaseOrderCursorPagination.ordering
+        )
+        paginator = PurchaseOrderCursorPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = PurchaseOrderSerializer(page, many=True, fields=fields)
+        return paginator.get_paginated_response(serializer.data)
 
+    @transaction.atomic
     def post(self, request):
 
         """
@@ -75,11 +103,112 @@ class PurchaseOrderListAPIView(APIView):
         )
 
 
+class PurchaseOrderBulkCreateAPIView(APIView):
+    """
+    API View for creating many purchase orders in one request.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        """
+        Create a batch of purchase orders.
+
+        Request Body:
+        - A list of purchase orders, each with po_number, vendor, items and
+          quantity. At most PURCHASE_ORDER_BULK_MAX_SIZE orders per request.
+
+        The whole batch is validated first and inserted in one transaction,
+        so either every order is created or none is.
+
+        Returns:
+        - 201 Created: The purchase orders were successfully created.
+        - 400 Bad Request: The request was malformed. Errors are given per
+          item, in the order of the request, with {} for valid items.
+        """
+        serializer = PurchaseOrderBulkCreateSerializer(
+            data=request.data,
+            many=True
+        )
+        if not serializer.is_valid():
+            return Response(
+                serializer.errors,
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            purchase_orders = serializer.save()
+        except IntegrityError:
+            # Another request created one of the PO numbers after validation.
+            return Response(
+                {
+                    'error': 'Purchase order with this po number already exists'
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(
+            PurchaseOrderSerializer(purchase_orders, many=True).data,
+            status=status.HTTP_201_CREATED
+        )
+
+
+class PurchaseOrderExportAPIView(APIView):
+    """
+    API View for streaming every purchase order as NDJSON or CSV.
+    """
+    permission_classes = [IsAuthenticated]
+    renderer_classes = [NDJSONRenderer, CSVRenderer]
+
+    def get(self, request):
+        """
+        Stream purchase orders without building the whole result in memory.
+
+        Parameters:
+        - format (str): Optional. `ndjson` or `csv`, otherwise chosen from
+          the Accept header. Defaults to NDJSON.
+        - vendor, status, from, to: Optional. Same filters as the list view.
+
+        Rows are read from the database PURCHASE_ORDER_EXPORT_CHUNK_SIZE at a
+        time and encoded as they are sent. The body is gzipped on the fly when
+        the client accepts gzip.
+
+        Returns:
+        - 200 OK: The purchase orders, one per line.
+        - 400 Bad Request: A date filter is malformed.
+        - 406 Not Acceptable: The requested format is not supported.
+        """
+        queryset = filter_purchase_orders(
+            PurchaseOrderModel.objects.all(),
+            request.query_params
+        ).order_by('issue_date', 'po_number')
+        rows = queryset.values(*EXPORT_FIELDS).iterator(
+            chunk_size=getattr(
+                settings,
+                'PURCHASE_ORDER_EXPORT_CHUNK_SIZE',
+                2000
+            )
+        )
+
+        renderer = request.accepted_renderer
+        content = batch_stream(renderer.stream(rows), renderer.charset)
+        response = StreamingHttpResponse(
+            content_type=f'{renderer.media_type}; charset={renderer.charset}'
+        )
+        if accepts_gzip(request.META.get('HTTP_ACCEPT_ENCODING', '')):
+            content = gzip_stream(content)
+            response['Content-Encoding'] = 'gzip'
+        response['Vary'] = 'Accept, Accept-Encoding'
+        response['Content-Disposition'] = (
+            f'attachment; filename="purchase_orders.{renderer.format}"'
+        )
+        response.streaming_content = content
+        return response
+
+
 class PurchaseOrderSpecificAPIView(APIView):
     """
     API View for fetching, updating, and deleting specific purchase orders.
     """
     permission_classes = [IsAuthenticated]
+    replica_reads = True
     def get(self, request, pk):
 
         """
@@ -87,19 +216,64 @@ class PurchaseOrderSpecificAPIView(APIView):
         
         Path Parameters:
         - pk (int): The PO number of the purchase order to retrieve.
+
+        Query Parameters:
+        - fields (str): Optional. Comma separated fields to return, e.g.
+          `status,delivery_date`. Only their columns are read, so leaving
+          out `items` skips reading and decoding it.
+        - exclude (str): Optional. Comma separated fields to leave out.
+        
+        Conditional Requests:
+        - Sends ETag and Last-Modified. With If-None-Match or
+          If-Modified-Since, only the order's updated_at is read and
+          304 Not Modified is returned when nothing changed.
         
         Returns:
         - 200 OK: The purchase order details.
+        - 304 Not Modified: The client's copy is current.
+        - 400 Bad Request: The fields or exclude parameter is invalid.
         - 404 Not Found: The purchase order does not exist.
         """
 
-        purchase_order = PurchaseOrderModel.objects.get(po_number=pk)
+        fields = sparse_fields(
+            request.query_params, PurchaseOrderCreateSerializer
+        )
+        representation = sparse_representation('purchase-order', fields)
+        if has_conditional_headers(request):
+            updated_at = PurchaseOrderModel.objects.filter(
+                po_number=pk
+            ).values_list('updated_at', flat=True).first()
+            if updated_at is not None:
+                not_modified = not_modified_response(
+                    request, representation, pk, updated_at
+                )
+                if not_modified is not None:
+                    return not_modified
+        try:
+            purchase_order = sparse_queryset(
+                PurchaseOrderModel.objects.all(),
+                PurchaseOrderCreateSerializer,
+                fields,
+                ['updated_at']
+            ).get(po_number=pk)
+        except PurchaseOrderModel.DoesNotExist:
+            return Response(
+                {
+                    'error': 'Purchase Order not found'
+                },
+                status=status.HTTP_404_NOT_FOUND
+            )
         serializer = PurchaseOrderCreateSerializer(
             purchase_order, 
-            many=False
+            many=False,
+            fields=fields
+        )
+        return set_validators(
+            Response(serializer.data),
+            representation, pk, purchase_order.updated_at
         )
-        return Response(serializer.data)
 
+    @transaction.atomic
     def put(self, request, pk):
         """
         Update a specific purchase order by its PO number.
@@ -115,6 +289,9 @@ class PurchaseOrderSpecificAPIView(APIView):
           vendors with change in  puchase orders
         - Quality rating average will be calculated everytime whenever update request is given
         - on time delivery and fulfillment rate is calculated when status change to complete
+        - The affected metrics are saved together with a single vendor update
+        - With VENDOR_METRICS_DEFERRED, a metric job is queued for the vendor
+          instead and the metrics are recomputed by the metric worker
         
         Returns:
         - 200 OK: The purchase order was successfully updated.
@@ -140,14 +317,14 @@ class PurchaseOrderSpecificAPIView(APIView):
         
         # parameter needed for performance metric functions
         expected_delivery_date = purchase_order.delivery_date
-        prev_quality_rating=purchase_order.quality_rating
         fl=False # for checking weather the status is already completed
         if 'quality_rating' in request.data:
             purchase_order.quality_rating = request.data['quality_rating']
 
         if(purchase_order.status != "completed"):
             purchase_order.status = "completed"
-            purchase_order.delivery_date = timezone.localtime(utc)
+            purchase_order.expected_delivery_date = expected_delivery_date
+            purchase_order.delivery_date = timezone.localtime(timezone.now())
             fl=True
 
         serializer = PurchaseOrderUpdateSerializer(
@@ -158,24 +335,21 @@ class PurchaseOrderSpecificAPIView(APIView):
 
         if serializer.is_valid():
             serializer.save()
-            # Performace Metric Function
-            if(fl==False): 
-                # Only trigger when order status is changed
-                on_time_delivery_rate(
-                    self, 
-                    purchase_order, 
-                    expected_delivery_date
-                )
-                fulfillment_rate(
-                    self, 
-                    purchase_order
+            if metrics_deferred():
+                # Recomputed by the metric worker
+                enqueue_vendor_metrics([purchase_order.vendor_id])
+                return Response(
+                    serializer.data, 
+                    status=status.HTTP_200_OK
                 )
-            # Trigger everytime there is a update    
-            quality_rating_avg(
-                self, 
-                purchase_order,
-                prev_quality_rating
-            )
+            # Performace Metric Function
+            # Quality rating average is affected by every update
+            metric_fields = ['quality_rating_avg']
+            if(fl==True):
+                # Only affected when order status is changed
+                metric_fields += ['on_time_delivery_rate', 'fulfillment_rate']
+            # One vendor write and one history snapshot for the event
+            update_vendor_metrics(purchase_order.vendor, metric_fields)
             return Response(
                 serializer.data, 
                 status=status.HTTP_200_OK
@@ -185,12 +359,18 @@ class PurchaseOrderSpecificAPIView(APIView):
             status=status.HTTP_400_BAD_REQUEST
         )
 
+    @transaction.atomic
     def delete(self, request, pk):
         """
         Delete a specific purchase order by its PO number.
         
         Path Parameters:
         - pk (int): The PO number of the purchase order to delete.
+
+        Real-time Update:
+        - The vendor's four performance metrics are recomputed without the
+          deleted order, or a metric job is queued with
+          VENDOR_METRICS_DEFERRED
         
         Returns:
         - 204 No Content: The purchase order was successfully deleted.
@@ -199,6 +379,10 @@ class PurchaseOrderSpecificAPIView(APIView):
         try:
             purchase_order = PurchaseOrderModel.objects.get(po_number=pk)
             purchase_order.delete()
+            if metrics_deferred():
+                enqueue_vendor_metrics([purchase_order.vendor_id])
+            else:
+                update_vendor_metrics(purchase_order.vendor)
             return Response(
                 {
                     'message': 'Vendor deleted successfully'
@@ -219,6 +403,7 @@ class AcknowledgePurchaseOrderApiView(APIView):
     API View for acknowledging a purchase order.
     """
     permission_classes = [IsAuthenticated]
+    @transaction.atomic
     def post(self, request, pk):
         """
         Acknowledge a specific purchase order by its PO number.
@@ -228,6 +413,7 @@ class AcknowledgePurchaseOrderApiView(APIView):
         
         Real Time Update:
         - Calculate average response time whenever a order is acknowledged.
+        - With VENDOR_METRICS_DEFERRED, a metric job is queued for the vendor instead.
         Returns:
         - 200 OK: The purchase order was successfully acknowledged.
         - 404 Not Found: The purchase order does not exist.
@@ -252,14 +438,20 @@ class AcknowledgePurchaseOrderApiView(APIView):
                     status=status.HTTP_405_METHOD_NOT_ALLOWED
             )
         
-        purchase_order.acknowledgment_date = timezone.localtime(utc)
+        purchase_order.acknowledgment_date = timezone.localtime(
+            timezone.now()
+        )
         purchase_order.save(
             update_fields=[
-                'acknowledgment_date'
+                'acknowledgment_date',
+                'updated_at'
                 ]
         )
 
-        calculate_avg_response_time(self, purchase_order)
+        if metrics_deferred():
+            enqueue_vendor_metrics([purchase_order.vendor_id])
+        else:
+            calculate_avg_response_time(self, purchase_order)
 
         return Response(
             {
@@ -267,3 +459,206 @@ class AcknowledgePurchaseOrderApiView(APIView):
             }, 
             status=status.HTTP_200_OK
         )
+
+
+class BulkAcknowledgePurchaseOrderApiView(APIView):
+    """
+    API View for acknowledging many purchase orders at once.
+    """
+    permission_classes = [IsAuthenticated]
+    def post(self, request):
+        """
+        Acknowledge a batch of purchase orders by their PO numbers.
+
+        Request Body:
+        - po_numbers (list): The PO numbers of the purchase orders to acknowledge.
+          At most PURCHASE_ORDER_BULK_MAX_SIZE per request.
+
+        Real Time Update:
+        - Stamps the acknowledgment date on every pending order with one update.
+        - Calculate average response time once per affected vendor, which
+          writes one history snapshot per vendor.
+        - With VENDOR_METRICS_DEFERRED, one metric job is queued per vendor instead.
+        Returns:
+        - 200 OK: The PO numbers that were acknowledged, already acknowledged,
+          or not found.
+        - 400 Bad Request: The request was malformed.
+        """
+        serializer = PurchaseOrderBulkAcknowledgeSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                serializer.errors,
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        po_numbers = serializer.validated_data['po_numbers']
+        acknowledgment_date = timezone.localtime(timezone.now())
+
+        with transaction.atomic():
+            purchase_orders = list(
+                PurchaseOrderModel.objects.select_for_update().filter(
+                    po_number__in=po_numbers
+                ).only(
+                    'po_number',
+                    'vendor',
+                    'order_date',
+                    'acknowledgment_date'
+                )
+            )
+            pending = [
+                purchase_order for purchase_order in purchase_orders
+                if purchase_order.acknowledgment_date is None
+            ]
+            PurchaseOrderModel.objects.filter(
+                po_number__in=[
+                    purchase_order.po_number for purchase_order in pending
+                ]
+            ).update(
+                acknowledgment_date=acknowledgment_date,
+                updated_at=timezone.now()
+            )
+
+            # update() does not send post_save, so the vendors' order
+            # stats are updated here, once per vendor.
+            deltas = {}
+            for purchase_order in pending:
+                purchase_order.acknowledgment_date = acknowledgment_date
+                add_contribution(
+                    deltas,
+                    purchase_order.vendor_id,
+                    {
+                        'acknowledged_count': 1,
+                        'response_time_sum': (
+                            acknowledgment_date - purchase_order.order_date
+                        ).total_seconds() / 3600
+                    }
+                )
+            apply_order_stats(deltas)
+            if metrics_deferred():
+                enqueue_vendor_metrics(deltas)
+            else:
+                calculate_bulk_avg_response_time(self, pending)
+
+        found = {
+            purchase_order.po_number for purchase_order in purchase_orders
+        }
+        acknowledged = {
+            purchase_order.po_number for purchase_order in pending
+        }
+        return Response(
+            {
+                'acknowledged': [
+                    po_number for po_number in po_numbers
+                    if po_number in acknowledged
+                ],
+                'already_acknowledged': [
+                    po_number for po_number in po_numbers
+                    if po_number in found and po_number not in acknowledged
+                ],
+                'not_found': [
+                    po_number for po_number in po_numbers
+                    if po_number not in found
+                ]
+            },
+            status=status.HTTP_200_OK
+        )
+
+
+class AsyncPurchaseOrderListAPIView(AsyncAPIView):
+    """
+    Async API View for listing purchase orders.
+    """
+    replica_reads = True
+
+    async def get(self, request):
+        """
+        Retrieve purchase orders one page at a time without leaving the
+        event loop.
+
+        Parameters:
+        - vendor, status, from, to, cursor, page_size, fields, exclude:
+          Optional. Same as GET /api/purchase_orders/.
+
+        Returns:
+        - 200 OK: A page of purchase orders ordered by issue date and PO number,
+          along with the link to the next page.
+        - 400 Bad Request: A date filter, fields or exclude is invalid.
+        - 404 Not Found: The cursor is invalid.
+        """
+        fields = sparse_fields(request.GET, PurchaseOrderSerializer)
+        queryset = sparse_queryset(
+            filter_purchase_orders(PurchaseOrderModel.objects.all(), request.GET),
+            PurchaseOrderSerializer,
+            fields,
+            PurchaseOrderCursorPagination.ordering
+        )
+        paginator = PurchaseOrderCursorPagination()
+        page = await paginator.apaginate_queryset(queryset, request)
+        serializer = PurchaseOrderSerializer(page, many=True, fields=fields)
+        return JsonResponse(
+            {
+                'next': paginator.get_next_link(),
+                'results': serializer.data
+            }
+        )
+
+
+class AsyncPurchaseOrderSpecificAPIView(AsyncAPIView):
+    """
+    Async API View for retrieving a specific purchase order.
+    """
+    replica_reads = True
+
+    async def get(self, request, pk):
+        """
+        Retrieve a specific purchase order by its PO number.
+
+        Path Parameters:
+        - pk (str): The PO number of the purchase order to retrieve.
+
+        Query Parameters:
+        - fields, exclude: Optional. Same as GET /api/purchase_orders/{pk}/.
+
+        Conditional Requests:
+        - Same ETag and Last-Modified as GET /api/purchase_orders/{pk}/.
+
+        Returns:
+        - 200 OK: The purchase order details.
+        - 304 Not Modified: The client's copy is current.
+        - 400 Bad Request: The fields or exclude parameter is invalid.
+        - 404 Not Found: The purchase order does not exist.
+        """
+        fields = sparse_fields(request.GET, PurchaseOrderCreateSerializer)
+        representation = sparse_representation('purchase-order', fields)
+        if has_conditional_headers(request):
+            updated_at = await PurchaseOrderModel.objects.filter(
+                po_number=pk
+            ).values_list('updated_at', flat=True).afirst()
+            if updated_at is not None:
+                not_modified = not_modified_response(
+                    request, representation, pk, updated_at
+                )
+                if not_modified is not None:
+                    return not_modified
+        try:
+            purchase_order = await sparse_queryset(
+                PurchaseOrderModel.objects.all(),
+                PurchaseOrderCreateSerializer,
+                fields,
+                ['updated_at']
+            ).aget(po_number=pk)
+        except PurchaseOrderModel.DoesNotExist:
+            return JsonResponse(
+                {
+                    'error': 'Purchase Order not found'
+                },
+                status=status.HTTP_404_NOT_FOUND
+            )
+        serializer = PurchaseOrderCreateSerializer(
+            purchase_order,
+            many=False,
+            fields=fields
+        )
+        return set_validators(
+            JsonResponse(serializer.data),
+            representation, pk, purchase_order.updated_at
+        )
@@ -0,0 +1,83 @@
+"""
+Base class for the async (ASGI-native) read endpoints.
+
+DRF's APIView only runs synchronously, so under ASGI every request to it is
+handed to a worker thread. The views built on AsyncAPIView stay on the
+event loop: they authenticate the JWT and query the database with Django's
+async ORM, and only serialize already loaded rows.
+"""
+from django.http import JsonResponse
+from django.views import View
+from rest_framework import status
+from rest_framework.exceptions import APIException, AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from .authentication import CachedJWTAuthentication
+from .timing import timed_phase
+
+
+async def aauthenticate(request):
+    """
+    Authenticate a request from its JWT Authorization header.
+
+    Token validation is CPU only; the user is read from the user cache or
+    fetched with the async ORM, as CachedJWTAuthentication does.
+
+    Returns:
+    - The active user of the token, or None when no token was given.
+
+    Raises AuthenticationFailed when the token or its user is invalid.
+    """
+    authentication = CachedJWTAuthentication()
+    header = authentication.get_header(request)
+    if header is None:
+        return None
+    raw_token = authentication.get_raw_token(header)
+    if raw_token is None:
+        return None
+    try:
+        validated_token = authentication.get_validated_token(raw_token)
+    except (InvalidToken, TokenError):
+        raise AuthenticationFailed('Given token not valid for any token type')
+    return await authentication.aget_user(validated_token)
+
+
+class AsyncAPIView(View):
+    """
+    Async counterpart of an authenticated APIView.
+
+    Handlers are `async def` methods returning a JsonResponse. Requests
+    without a valid token get 401, and DRF exceptions raised by the
+    handlers (NotFound, ValidationError...) are turned into JSON errors
+    the same way DRF does.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            with timed_phase('auth'):
+                request.user = await aauthenticate(request)
+            if request.user is None:
+                return self.unauthorized(
+                    'Authentication credentials were not provided.'
+                )
+            return await super().dispatch(request, *args, **kwargs)
+        except AuthenticationFailed as exc:
+            return self.unauthorized(exc.detail)
+        except APIException as exc:
+            detail = exc.detail
+            if not isinstance(detail, (list, dict)):
+                detail = {'detail': detail}
+            return JsonResponse(
+                detail,
+                status=exc.status_code,
+                safe=False
+            )
+
+    def unauthorized(self, detail):
+        if not isinstance(detail, dict):
+            detail = {'detail': detail}
+        response = JsonResponse(
+            detail,
+            status=status.HTTP_401_UNAUTHORIZED
+        )
+        response['WWW-Authenticate'] = 'Bearer realm="api"'
+        return response
@@ -0,0 +1,151 @@
+"""
+Authentication classes of the API.
+
+JWTAuthentication loads the user of the token from the database on every
+request. CachedJWTAuthentication keeps the loaded user in the cache for
+JWT_USER_CACHE_TTL seconds instead, under a key made of the user id and
+the user's auth version. Saving or deleting a user bumps its version, so a
+deactivated user is refused on its next request.
+
+With JWT_CLAIMS_ONLY set, the user is built from the token claims alone and
+the database is never read: a deactivated or deleted user stays
+authenticated until its access token expires.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+from .timing import timed_phase
+
+
+def _user_cache():
+    return caches[getattr(settings, 'JWT_USER_CACHE_ALIAS', 'default')]
+
+
+def user_version_key(user_id):
+    """
+    Returns the cache key of a user's auth version.
+    """
+    return f'auth:user-version:{user_id}'
+
+
+def user_cache_key(user_id, version):
+    """
+    Returns the cache key of a user at an auth version.
+    """
+    return f'auth:user:{user_id}:{version}'
+
+
+def invalidate_user(user_id):
+    """
+    Bump the auth version of a user, dropping its cached entries.
+    """
+    cache = _user_cache()
+    key = user_version_key(user_id)
+    version = cache.get(key, 0)
+    # An evicted version would restart at 0, drop that entry too.
+    cache.delete_many([user_cache_key(user_id, version), user_cache_key(user_id, 0)])
+    cache.set(key, version + 1, None)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_saved_user(sender, instance, **kwargs):
+    invalidate_user(getattr(instance, api_settings.USER_ID_FIELD))
+
+
+def token_user_id(validated_token):
+    try:
+        return validated_token[api_settings.USER_ID_CLAIM]
+    except KeyError:
+        raise InvalidToken('Token contained no recognizable user identification')
+
+
+def check_user(user, validated_token):
+    """
+    Returns the user when it may use the token, the checks of
+    JWTAuthentication.get_user.
+    """
+    if not user.is_active:
+        raise AuthenticationFailed('User is inactive', code='user_inactive')
+    if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+        api_settings.REVOKE_TOKEN_CLAIM
+    ) != get_md5_hash_password(user.password):
+        raise AuthenticationFailed(
+            "The user's password has been changed.", code='password_changed'
+        )
+    return user
+
+
+def claims_only():
+    return getattr(settings, 'JWT_CLAIMS_ONLY', False)
+
+
+def cache_ttl():
+    return getattr(settings, 'JWT_USER_CACHE_TTL', 30)
+
+
+class TimedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication recording its time as the auth phase of the request.
+    """
+
+    def authenticate(self, request):
+        with timed_phase('auth'):
+            return super().authenticate(request)
+
+
+class CachedJWTAuthentication(TimedJWTAuthentication):
+    """
+    TimedJWTAuthentication reading the user from the cache, or from the
+    token claims alone with JWT_CLAIMS_ONLY, see the module documentation.
+    """
+
+    def get_user(self, validated_token):
+        if claims_only():
+            token_user_id(validated_token)
+            return api_settings.TOKEN_USER_CLASS(validated_token)
+        if not cache_ttl():
+            return super().get_user(validated_token)
+
+        user_id = token_user_id(validated_token)
+        cache = _user_cache()
+        version = cache.get(user_version_key(user_id), 0)
+        user = cache.get(user_cache_key(user_id, version))
+        if user is not None:
+            return check_user(user, validated_token)
+        user = super().get_user(validated_token)
+        cache.set(user_cache_key(user_id, version), user, cache_ttl())
+        return user
+
+    async def aget_user(self, validated_token):
+        """
+        Async counterpart of get_user, querying with the async ORM.
+        """
+        if claims_only():
+            token_user_id(validated_token)
+            return api_settings.TOKEN_USER_CLASS(validated_token)
+
+        user_id = token_user_id(validated_token)
+        cache = _user_cache()
+        ttl = cache_ttl()
+        if ttl:
+            version = await cache.aget(user_version_key(user_id), 0)
+            user = await cache.aget(user_cache_key(user_id, version))
+            if user is not None:
+                return check_user(user, validated_token)
+        try:
+            user = await get_user_model().objects.aget(
+                **{api_settings.USER_ID_FIELD: user_id}
+            )
+        except get_user_model().DoesNotExist:
+            raise AuthenticationFailed('User not found', code='user_not_found')
+        check_user(user, validated_token)
+        if ttl:
+            await cache.aset(user_cache_key(user_id, version), user, ttl)
+        return user
@@ -0,0 +1,47 @@
+"""
+ETag and Last-Modified support for detail views.
+
+Validators are derived from a row's updated_at column, so a conditional
+request can be answered with 304 Not Modified without loading or
+serializing the object.
+"""
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def has_conditional_headers(request):
+    """
+    Returns True when the request carries If-None-Match or If-Modified-Since.
+    """
+    return (
+        'HTTP_IF_NONE_MATCH' in request.META or
+        'HTTP_IF_MODIFIED_SINCE' in request.META
+    )
+
+
+def make_etag(representation, pk, updated_at):
+    """
+    Returns the ETag of one representation of a row at a given version.
+    """
+    return quote_etag(f'{representation}-{pk}-{updated_at.timestamp():.6f}')
+
+
+def not_modified_response(request, representation, pk, updated_at):
+    """
+    Returns a 304 Not Modified response when the client's copy is still
+    current, otherwise None.
+    """
+    return get_conditional_response(
+        request,
+        etag=make_etag(representation, pk, updated_at),
+        last_modified=int(updated_at.timestamp())
+    )
+
+
+def set_validators(response, representation, pk, updated_at):
+    """
+    Add the ETag and Last-Modified headers to a response.
+    """
+    response['ETag'] = make_etag(representation, pk, updated_at)
+    response['Last-Modified'] = http_date(updated_at.timestamp())
+    return response
@@ -0,0 +1,158 @@
+"""
+Read/write splitting between the primary database and its replicas.
+
+Views opt in with a `replica_reads = True` class attribute. The GET, HEAD
+and OPTIONS requests they handle read from a random alias of
+DATABASE_REPLICAS; every other query, and every write, goes to the
+`default` (primary) database.
+
+A client that sent a write keeps reading from the primary for
+REPLICA_STICKY_SECONDS, so it sees its own changes despite replication
+lag. Clients are told apart by their Authorization header, or their
+address when they send none, and the marks are kept in the default cache.
+Code that must read what was just written, like the metric functions,
+runs under use_primary().
+"""
+import hashlib
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# The routing of the current request: whether its reads may go to a replica.
+_routing = ContextVar('db_routing', default=None)
+
+
+def replica_aliases():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+@contextmanager
+def use_primary():
+    """
+    Send the reads of the block to the primary, even in a view reading from
+    the replicas. Also usable as a decorator.
+    """
+    state = _routing.get()
+    if state is None:
+        yield
+        return
+    replica = state['replica']
+    state['replica'] = False
+    try:
+        yield
+    finally:
+        state['replica'] = replica
+
+
+@contextmanager
+def use_replicas():
+    """
+    Send the reads of the block to the replicas, like a replica-enabled
+    view does. For scripts and tests.
+    """
+    token = _routing.set({'replica': True})
+    try:
+        yield
+    finally:
+        _routing.reset(token)
+
+
+def client_key(request):
+    """
+    Returns the cache key marking a client as recently written.
+    """
+    identity = request.headers.get('Authorization') or request.META.get(
+        'REMOTE_ADDR', ''
+    )
+    digest = hashlib.sha1(identity.encode('utf-8')).hexdigest()
+    return f'db:sticky:{digest}'
+
+
+class PrimaryReplicaRouter:
+    """
+    Database router sending the reads of replica-enabled requests to the
+    replicas, and everything else to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _routing.get()
+        replicas = replica_aliases()
+        if state is not None and state['replica'] and replicas:
+            return random.choice(replicas)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replicas hold the same rows as the primary.
+        aliases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas are copies of the primary, never migrated on their own.
+        if db in replica_aliases():
+            return False
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Enable replica reads for the views asking for them, unless the client
+    wrote recently, and mark the clients sending writes.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _routing.set({'replica': False})
+        try:
+            return self.get_response(request)
+        finally:
+            _routing.reset(token)
+            self.mark_writer(request)
+
+    async def __acall__(self, request):
+        token = _routing.set({'replica': False})
+        try:
+            return await self.get_response(request)
+        finally:
+            _routing.reset(token)
+            self.mark_writer(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'view_class', None)
+        if (
+            request.method in SAFE_METHODS
+            and getattr(view_class, 'replica_reads', False)
+            and replica_aliases()
+            and cache.get(client_key(request)) is None
+        ):
+            # Mutated rather than set, process_view may run in a copy of
+            # the request's context.
+            _routing.get()['replica'] = True
+        return None
+
+    def mark_writer(self, request):
+        if request.method in SAFE_METHODS or not replica_aliases():
+            return
+        cache.set(
+            client_key(request),
+            True,
+            getattr(settings, 'REPLICA_STICKY_SECONDS', 5)
+        )
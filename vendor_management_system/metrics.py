@@ -0,0 +1,564 @@
+"""
+Prometheus metrics of the service, without any client library.
+
+Metrics are plain counters, gauges and histograms held in this process.
+Each metric guards its values with its own lock, held only for the
+increment, so threaded workers can update them concurrently.
+
+With METRICS_MULTIPROCESS_DIR set, every process writes its values to a
+file of its own in that directory, at most every METRICS_FLUSH_INTERVAL
+seconds and when it exits. One thread writes at a time, through a
+temporary file of its own, and a failed write is logged without failing
+the update that triggered it. The /metrics view of any process then serves
+the sum over all the files. Gauges of processes that are no longer
+running are left out; counters and histograms of such processes are
+kept, so totals never go down when a worker is replaced.
+
+A file is named after the process's pid and the time it first wrote, so
+a new process reusing the pid of a dead one never replaces its file. The
+collecting process merges the counters and histograms of dead processes
+into a single file, MERGED_FILE, and removes their files, so the
+directory does not grow with every replaced worker.
+"""
+import atexit
+import bisect
+import contextlib
+import fcntl
+import functools
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+
+# Default buckets of the latency histograms, in seconds.
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# File of the multi-process directory holding the merged counters and
+# histograms of processes that are no longer running.
+MERGED_FILE = 'merged.json'
+
+logger = logging.getLogger(__name__)
+
+
+class Registry:
+    """
+    The metrics of the process, and their files in the multi-process
+    directory.
+    """
+
+    def __init__(self):
+        self.metrics = {}
+        self.next_flush = 0.0
+        self.flush_lock = threading.Lock()
+        self.process = None
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def file_name(self):
+        """
+        Returns the name of this process's file in the multi-process
+        directory.
+        """
+        pid = os.getpid()
+        # A forked worker gets a name of its own.
+        if self.process is None or self.process[0] != pid:
+            self.process = (pid, f'{pid}-{time.time_ns()}.json')
+        return self.process[1]
+
+    def snapshot(self):
+        return {
+            name: [[list(key), value] for key, value in metric.items()]
+            for name, metric in self.metrics.items()
+        }
+
+    def flush(self):
+        """
+        Write the values of this process to its file in the multi-process
+        directory, when one is set.
+        """
+        if not getattr(settings, 'METRICS_MULTIPROCESS_DIR', None):
+            return
+        with self.flush_lock:
+            self.write()
+
+    def maybe_flush(self):
+        """
+        Flush when METRICS_FLUSH_INTERVAL has passed since the last flush,
+        unless another thread is flushing.
+        """
+        if time.monotonic() < self.next_flush:
+            return
+        if not self.flush_lock.acquire(blocking=False):
+            return
+        try:
+            now = time.monotonic()
+            if now < self.next_flush:
+                return
+            self.next_flush = now + getattr(
+                settings, 'METRICS_FLUSH_INTERVAL', 1.0
+            )
+            if getattr(settings, 'METRICS_MULTIPROCESS_DIR', None):
+                self.write()
+        finally:
+            self.flush_lock.release()
+
+    def write(self):
+        """
+        Replace this process's file with its current values. Called with
+        flush_lock held; errors are logged, not raised.
+        """
+        directory = settings.METRICS_MULTIPROCESS_DIR
+        path = os.path.join(directory, self.file_name())
+        try:
+            os.makedirs(directory, exist_ok=True)
+            write_snapshot(path, self.snapshot())
+        except Exception:
+            logger.exception("Could not write the metrics to %s", path)
+
+    def merge_dead(self, directory, paths):
+        """
+        Add the counters and histograms of the files of dead processes to
+        MERGED_FILE and remove the files. Collecting processes take turns
+        through a lock file, so each file is merged once.
+        """
+        with open(os.path.join(directory, 'merged.lock'), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            merged_path = os.path.join(directory, MERGED_FILE)
+            merged = read_snapshot(merged_path) or {}
+            removed = []
+            for path in paths:
+                snapshot = read_snapshot(path)
+                if snapshot is None:
+                    # Merged by another process meanwhile.
+                    continue
+                for name, values in snapshot.items():
+                    metric = self.metrics.get(name)
+                    if metric is None or metric.type == 'gauge':
+                        continue
+                    totals = {
+                        tuple(key): value
+                        for key, value in merged.get(name, [])
+                    }
+                    for key, value in values:
+                        key = tuple(key)
+                        totals[key] = metric.combine(totals.get(key), value)
+                    merged[name] = [
+                        [list(key), value] for key, value in totals.items()
+                    ]
+                removed.append(path)
+            if not removed:
+                return
+            write_snapshot(merged_path, merged)
+            for path in removed:
+                with contextlib.suppress(OSError):
+                    os.remove(path)
+
+    def collect(self):
+        """
+        Returns the values of every metric, summed over the processes of the
+        multi-process directory when one is set.
+        """
+        directory = getattr(settings, 'METRICS_MULTIPROCESS_DIR', None)
+        if not directory:
+            return {
+                name: dict(metric.items())
+                for name, metric in self.metrics.items()
+            }
+
+        self.flush()
+        dead = [
+            entry.path for entry in os.scandir(directory)
+            if entry.name.endswith('.json') and entry.name != MERGED_FILE
+            and not process_running(file_pid(entry.name))
+        ]
+        if dead:
+            try:
+                self.merge_dead(directory, dead)
+            except Exception:
+                logger.exception("Could not merge the metrics in %s", directory)
+
+        totals = {name: {} for name in self.metrics}
+        for entry in os.scandir(directory):
+            if not entry.name.endswith('.json'):
+                continue
+            running = (
+                entry.name != MERGED_FILE
+                and process_running(file_pid(entry.name))
+            )
+            snapshot = read_snapshot(entry.path)
+            if snapshot is None:
+                continue
+            for name, values in snapshot.items():
+                metric = self.metrics.get(name)
+                if metric is None or (metric.type == 'gauge' and not running):
+                    continue
+                for key, value in values:
+                    key = tuple(key)
+                    totals[name][key] = metric.combine(
+                        totals[name].get(key), value
+                    )
+        return totals
+
+    def exposition(self):
+        """
+        Returns every metric in the Prometheus text exposition format.
+        """
+        lines = []
+        for name, values in self.collect().items():
+            metric = self.metrics[name]
+            lines.append(f'# HELP {name} {metric.documentation}')
+            lines.append(f'# TYPE {name} {metric.type}')
+            for key, value in sorted(values.items()):
+                lines.extend(metric.sample_lines(key, value))
+        return '\n'.join(lines) + '\n'
+
+
+def file_pid(name):
+    """
+    Returns the pid of the process a multi-process file belongs to.
+    """
+    return int(name[:-len('.json')].split('-')[0])
+
+
+def read_snapshot(path):
+    """
+    Returns the values stored in a multi-process file, or None when it was
+    removed or is being replaced.
+    """
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def write_snapshot(path, snapshot):
+    """
+    Replace a multi-process file with new values, through a temporary file
+    of its own so readers never see a partial file.
+    """
+    descriptor, temporary = tempfile.mkstemp(
+        dir=os.path.dirname(path),
+        prefix=f'{os.getpid()}.',
+        suffix='.tmp'
+    )
+    try:
+        with os.fdopen(descriptor, 'w') as file:
+            json.dump(snapshot, file)
+        os.replace(temporary, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(temporary)
+        raise
+
+
+def process_running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def escape_label(value):
+    return (
+        str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+    )
+
+
+def format_labels(names, values):
+    if not names:
+        return ''
+    pairs = ','.join(
+        f'{name}="{escape_label(value)}"' for name, value in zip(names, values)
+    )
+    return '{' + pairs + '}'
+
+
+def format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """
+    A metric with a value per combination of its label values.
+    """
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+        self.values = {}
+        REGISTRY.register(self)
+
+    def key(self, labels):
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def items(self):
+        with self.lock:
+            return [
+                (key, self.copy(value)) for key, value in self.values.items()
+            ]
+
+    def copy(self, value):
+        return value
+
+    def combine(self, total, value):
+        return value if total is None else total + value
+
+    def sample_lines(self, key, value):
+        return [
+            f'{self.name}{format_labels(self.labelnames, key)} '
+            f'{format_value(value)}'
+        ]
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self.key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+        REGISTRY.maybe_flush()
+
+
+class Gauge(Metric):
+    type = 'gauge'
+
+    def inc(self, amount=1, **labels):
+        key = self.key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+        REGISTRY.maybe_flush()
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    """
+    Counts observations per bucket. A value holds the count of each bucket
+    (not cumulative, the last one for +Inf), the sum and the count.
+    """
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(),
+                 buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        super().__init__(name, documentation, labelnames)
+
+    def observe(self, amount, **labels):
+        key = self.key(labels)
+        index = bisect.bisect_left(self.buckets, amount)
+        with self.lock:
+            value = self.values.get(key)
+            if value is None:
+                # Bucket counts, then the sum and the count.
+                value = [0] * (len(self.buckets) + 1) + [0.0, 0]
+                self.values[key] = value
+            value[index] += 1
+            value[-2] += amount
+            value[-1] += 1
+        REGISTRY.maybe_flush()
+
+    def copy(self, value):
+        return list(value)
+
+    def combine(self, total, value):
+        if total is None:
+            return list(value)
+        return [left + right for left, right in zip(total, value)]
+
+    def sample_lines(self, key, value):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), value):
+            cumulative += count
+            labels = format_labels(
+                self.labelnames + ('le',),
+                key + (format_value(float(bound)),)
+            )
+            lines.append(f'{self.name}_bucket{labels} {cumulative}')
+        labels = format_labels(self.labelnames, key)
+        lines.append(f'{self.name}_sum{labels} {format_value(value[-2])}')
+        lines.append(f'{self.name}_count{labels} {value[-1]}')
+        return lines
+
+
+REGISTRY = Registry()
+atexit.register(REGISTRY.flush)
+
+REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds',
+    'Time spent handling a request, per route.',
+    ['method', 'route', 'status']
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    'http_requests_in_flight',
+    'Requests being handled.'
+)
+DB_QUERIES = Counter(
+    'http_request_db_queries_total',
+    'SQL queries run while handling requests, per route.',
+    ['route']
+)
+METRIC_FUNCTION_DURATION = Histogram(
+    'vendor_metric_function_duration_seconds',
+    'Calls and duration of the vendor performance metric functions.',
+    ['function']
+)
+HISTORY_ROWS_WRITTEN = Counter(
+    'vendor_history_rows_written_total',
+    'Performance history snapshots inserted.'
+)
+PERFORMANCE_CACHE_REQUESTS = Counter(
+    'vendor_performance_cache_requests_total',
+    'Lookups of the vendor performance cache, per outcome.',
+    ['outcome']
+)
+
+
+def timed_metric_function(function):
+    """
+    Decorator recording the calls and duration of a metric function.
+    """
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            METRIC_FUNCTION_DURATION.observe(
+                time.perf_counter() - started,
+                function=function.__name__
+            )
+    return wrapper
+
+
+_request_queries = ContextVar('request_queries', default=None)
+
+
+def count_query(execute, sql, params, many, context):
+    """
+    Database execute wrapper counting the queries of the current request.
+    """
+    queries = _request_queries.get()
+    if queries is not None:
+        queries[0] += 1
+    return execute(sql, params, many, context)
+
+
+def install_query_counter(connection, **kwargs):
+    if count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, count_query)
+
+
+connection_created.connect(install_query_counter)
+
+
+class MetricsMiddleware:
+    """
+    Record the duration, route and query count of every request, and the
+    number of requests in flight.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        # Connections opened before this module was loaded.
+        for connection in connections.all(initialized_only=True):
+            install_query_counter(connection)
+        started, token = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            queries = self.finish(token)
+        self.record(request, response, started, queries)
+        return response
+
+    async def __acall__(self, request):
+        started, token = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            queries = self.finish(token)
+        self.record(request, response, started, queries)
+        return response
+
+    def start(self):
+        REQUESTS_IN_FLIGHT.inc()
+        return time.perf_counter(), _request_queries.set([0])
+
+    def finish(self, token):
+        queries = _request_queries.get()[0]
+        _request_queries.reset(token)
+        REQUESTS_IN_FLIGHT.dec()
+        return queries
+
+    def record(self, request, response, started, queries):
+        match = request.resolver_match
+        route = match.route if match is not None else 'unmatched'
+        REQUEST_DURATION.observe(
+            time.perf_counter() - started,
+            method=request.method,
+            route=route,
+            status=response.status_code
+        )
+        DB_QUERIES.inc(queries, route=route)
+
+
+def metrics_view(request):
+    """
+    Serve every metric in the Prometheus text exposition format.
+
+    When METRICS_TOKEN is set, the scraper must send it as a bearer token.
+    The metric job queue is measured from the database on each scrape.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return HttpResponse(status=401)
+
+    # Imported here, the purchase order app imports this module.
+    from purchase_order.utils.metric_jobs import metric_queue_stats
+    queue = metric_queue_stats()
+    lines = [
+        '# HELP vendor_metric_queue_depth Vendor metric jobs waiting.',
+        '# TYPE vendor_metric_queue_depth gauge',
+        f"vendor_metric_queue_depth {queue['depth']}",
+        '# HELP vendor_metric_queue_lag_seconds Age of the oldest vendor '
+        'metric job.',
+        '# TYPE vendor_metric_queue_lag_seconds gauge',
+        f"vendor_metric_queue_lag_seconds {format_value(float(queue['lag']))}"
+    ]
+    return HttpResponse(
+        REGISTRY.exposition() + '\n'.join(lines) + '\n',
+        content_type=CONTENT_TYPE
+    )
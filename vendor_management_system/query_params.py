@@ -0,0 +1,34 @@
+"""
+Parsing of query parameters shared by the list views.
+"""
+from datetime import datetime, time
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+
+def parse_datetime_param(value, param):
+    """
+    Parse a query parameter given either as a date or a datetime.
+
+    Dates are taken at midnight and naive values in the current time zone.
+
+    Raises:
+    - ValidationError: The value could not be parsed.
+    """
+    try:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            parsed = datetime.combine(day, time.min) if day else None
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValidationError(
+            {
+                param: 'Enter a valid date or datetime.'
+            }
+        )
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
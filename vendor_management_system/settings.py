@@ -46,11 +46,27 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'vendor_management_system.authentication.CachedJWTAuthentication',
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'vendor_management_system.timing.TimedJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
     ],
 }
 
+# Purchase order list pagination
+PURCHASE_ORDER_PAGE_SIZE = 100
+PURCHASE_ORDER_MAX_PAGE_SIZE = 1000
+
+# Rows fetched per database round-trip by the purchase order export
+PURCHASE_ORDER_EXPORT_CHUNK_SIZE = 2000
+
+# Largest batch accepted by the purchase order bulk create endpoint
+PURCHASE_ORDER_BULK_MAX_SIZE = 1000
+
 MIDDLEWARE = [
+    'vendor_management_system.metrics.MetricsMiddleware',
+    'vendor_management_system.timing.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -58,8 +74,30 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'vendor_management_system.db_router.ReplicaRoutingMiddleware',
 ]
 
+# Fraction of the requests whose wall, database, auth and render times are
+# sent in a Server-Timing header and logged by RequestTimingMiddleware, and
+# how many runs of the same SQL in one request are reported as duplicates
+REQUEST_TIMING_SAMPLE_RATE = 0.1
+REQUEST_TIMING_DUPLICATE_THRESHOLD = 5
+
+# Prometheus metrics served at /metrics. Set a directory shared by the
+# worker processes to serve their sum, each process writing its values there
+# at most every METRICS_FLUSH_INTERVAL seconds. When METRICS_TOKEN is set,
+# scrapers must send it as a bearer token.
+METRICS_MULTIPROCESS_DIR = None
+METRICS_FLUSH_INTERVAL = 1.0
+METRICS_TOKEN = None
+
+# Users authenticated by a JWT are cached in this cache for this many
+# seconds (0 disables the cache). With JWT_CLAIMS_ONLY the user is built from
+# the token claims and never read from the database.
+JWT_USER_CACHE_ALIAS = 'default'
+JWT_USER_CACHE_TTL = 30
+JWT_CLAIMS_ONLY = False
+
 ROOT_URLCONF = 'vendor_management_system.urls'
 
 TEMPLATES = [
@@ -86,11 +124,104 @@ WSGI_APPLICATION = 'vendor_management_system.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'vendor_management_system.sqlite_backend',
         'NAME': BASE_DIR / 'db.sqlite3',
+    },
+    # Local stand-in replicas, refreshed with `manage.py sync_replicas`
+    'replica1': {
+        'ENGINE': 'vendor_management_system.sqlite_backend',
+        'NAME': BASE_DIR / 'replica1.sqlite3',
+        'TEST': {'MIRROR': 'default'},
+    },
+    'replica2': {
+        'ENGINE': 'vendor_management_system.sqlite_backend',
+        'NAME': BASE_DIR / 'replica2.sqlite3',
+        'TEST': {'MIRROR': 'default'},
+    },
+}
+
+# Pragmas run on every new SQLite connection, and the mode SQLite
+# transactions begin in (DEFERRED, IMMEDIATE or EXCLUSIVE, None for SQLite's
+# DEFERRED default). IMMEDIATE makes concurrent writers queue in the busy
+# timeout (ms) instead of failing with "database is locked".
+SQLITE_PRAGMAS = {
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+}
+SQLITE_TRANSACTION_MODE = 'IMMEDIATE'
+
+# Journal mode set on every new SQLite connection, None to keep the file's.
+# Unlike the pragmas above it is stored in the database file, and WAL adds
+# -wal and -shm files next to it, so it is left off for the db.sqlite3
+# tracked in the repository. Set 'WAL' for a deployed database so that
+# readers do not block the writer.
+SQLITE_JOURNAL_MODE = None
+
+DATABASE_ROUTERS = ['vendor_management_system.db_router.PrimaryReplicaRouter']
+
+# Aliases the list, detail and performance views read from (empty reads from
+# the default database), and for how many seconds a client that wrote keeps
+# reading from the default database
+DATABASE_REPLICAS = []
+REPLICA_STICKY_SECONDS = 5
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
 
+# Vendor performance payloads are cached in this cache for this many seconds
+VENDOR_PERFORMANCE_CACHE_ALIAS = 'default'
+VENDOR_PERFORMANCE_CACHE_TTL = 60
+
+# Performance history buckets per page
+PERFORMANCE_HISTORY_PAGE_SIZE = 1000
+PERFORMANCE_HISTORY_MAX_PAGE_SIZE = 10000
+
+# Performance history retention: raw snapshots are rolled up into hourly
+# rows after this many days, hourly rows into daily rows after this many
+PERFORMANCE_HISTORY_RAW_RETENTION_DAYS = 30
+PERFORMANCE_HISTORY_HOURLY_RETENTION_DAYS = 365
+PERFORMANCE_HISTORY_COMPACTION_BATCH_SIZE = 5000
+
+# History snapshots are inserted by the save that produces them when None,
+# or buffered and bulk inserted per 'transaction' or per time 'window'
+PERFORMANCE_HISTORY_BUFFER = None
+PERFORMANCE_HISTORY_FLUSH_INTERVAL = 1.0
+
+# Vendors per leaderboard page, and the weights of the leaderboard's
+# composite score (response times are in hours, lower ranks better)
+VENDOR_LEADERBOARD_LIMIT = 20
+VENDOR_LEADERBOARD_MAX_LIMIT = 1000
+VENDOR_SCORE_WEIGHTS = {
+    'on_time_delivery_rate': 1.0,
+    'quality_rating_avg': 0.2,
+    'average_response_time': -0.01,
+    'fulfillment_rate': 1.0
+}
+
+# Vendors per search response, by default and at most
+VENDOR_SEARCH_LIMIT = 20
+VENDOR_SEARCH_MAX_LIMIT = 100
+
+# Vendor metrics are recomputed by the run_metric_worker command instead of
+# inside the request when True
+VENDOR_METRICS_DEFERRED = False
+METRIC_WORKER_BATCH_SIZE = 100
+METRIC_WORKER_POLL_INTERVAL = 1.0
+METRIC_WORKER_MAX_RETRY_DELAY = 300
+# Seconds a worker holds its claimed jobs before others may claim them
+METRIC_WORKER_CLAIM_SECONDS = 60
+# Seconds a write rejected as locked is retried before its error is raised
+DATABASE_LOCK_RETRY_SECONDS = 5.0
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
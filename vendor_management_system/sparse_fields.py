@@ -0,0 +1,102 @@
+"""
+Sparse fieldsets: `?fields=` and `?exclude=` on the list and detail views.
+
+`fields` keeps only the listed fields of the response and `exclude` drops
+the listed ones, both comma separated. The selection narrows the
+serializer, and the view loads only the columns the selected fields read,
+so an unused column, like the items of a purchase order, is neither read
+nor decoded.
+"""
+from rest_framework.exceptions import ValidationError
+
+FIELDS_PARAM = 'fields'
+EXCLUDE_PARAM = 'exclude'
+
+
+def parse_names(value):
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+def sparse_fields(query_params, serializer_class):
+    """
+    Returns the names of the serializer fields selected by the `fields` and
+    `exclude` query parameters, in the serializer's order, or None when
+    neither is given.
+
+    Raises:
+    - ValidationError: Both parameters are given, a name is not a field of
+      the serializer, or no field is left.
+    """
+    if FIELDS_PARAM not in query_params and EXCLUDE_PARAM not in query_params:
+        return None
+    if FIELDS_PARAM in query_params and EXCLUDE_PARAM in query_params:
+        raise ValidationError(
+            {
+                FIELDS_PARAM: f'Give either {FIELDS_PARAM} or {EXCLUDE_PARAM}, '
+                'not both.'
+            }
+        )
+    param = FIELDS_PARAM if FIELDS_PARAM in query_params else EXCLUDE_PARAM
+    names = parse_names(query_params[param])
+    available = list(serializer_class().fields)
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise ValidationError(
+            {
+                param: f"Unknown fields: {', '.join(unknown)}. Choose from "
+                f"{', '.join(available)}."
+            }
+        )
+    if param == FIELDS_PARAM:
+        selected = [name for name in available if name in names]
+    else:
+        selected = [name for name in available if name not in names]
+    if not selected:
+        raise ValidationError({param: 'Select at least one field.'})
+    return selected
+
+
+def sparse_queryset(queryset, serializer_class, fields, required=()):
+    """
+    Load only the columns read by the selected serializer fields, plus the
+    `required` ones the view itself uses. The queryset is returned as is
+    when no fields are selected, or when a selected field does not read a
+    single column of the model.
+
+    Foreign keys are always loaded: they are small, and the models' field
+    trackers read them when an instance is created, one query per instance
+    when deferred.
+    """
+    if fields is None:
+        return queryset
+    serializer_fields = serializer_class().fields
+    concrete_fields = queryset.model._meta.concrete_fields
+    columns = {field.name for field in concrete_fields}
+    sources = [serializer_fields[name].source for name in fields]
+    if any(source not in columns for source in sources):
+        return queryset
+    foreign_keys = [field.name for field in concrete_fields if field.is_relation]
+    return queryset.only(*sources, *required, *foreign_keys)
+
+
+def sparse_representation(representation, fields):
+    """
+    Returns the representation name of a sparse response, so that its
+    validators differ from those of the full response.
+    """
+    if fields is None:
+        return representation
+    return f"{representation}[{','.join(fields)}]"
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer mixin taking a `fields` argument: the names of the fields to
+    keep, None for all of them.
+    """
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
@@ -0,0 +1,52 @@
+"""
+SQLite backend with connection pragmas and a configurable transaction mode.
+
+Every new connection runs the pragmas of SQLITE_PRAGMAS, e.g. a busy
+timeout, so that writers wait for each other instead of failing. It then
+sets SQLITE_JOURNAL_MODE, e.g. WAL, so that readers do not block the
+writer. The journal mode is stored in the database file, so it is only
+set when configured.
+
+Transactions begin in SQLITE_TRANSACTION_MODE. With IMMEDIATE, an atomic
+block takes the write lock when it starts. With the default DEFERRED mode,
+a block reading then writing must upgrade its read lock, and SQLite fails
+the upgrade with "database is locked" at once, without waiting out the busy
+timeout, when another connection is writing.
+"""
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+def pragma_statements(pragmas):
+    """
+    Returns the PRAGMA statements setting a dict of pragmas.
+    """
+    return [f'PRAGMA {name} = {value}' for name, value in pragmas.items()]
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for statement in pragma_statements(
+            getattr(settings, 'SQLITE_PRAGMAS', {})
+        ):
+            conn.execute(statement).fetchall()
+        journal_mode = getattr(settings, 'SQLITE_JOURNAL_MODE', None)
+        if journal_mode:
+            conn.execute(f'PRAGMA journal_mode = {journal_mode}').fetchall()
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        mode = getattr(settings, 'SQLITE_TRANSACTION_MODE', None)
+        if mode is None:
+            return super()._start_transaction_under_autocommit()
+        if mode.upper() not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(
+                f"SQLITE_TRANSACTION_MODE must be one of "
+                f"{', '.join(TRANSACTION_MODES)}."
+            )
+        self.cursor().execute(f'BEGIN {mode.upper()}')
@@ -0,0 +1,213 @@
+"""
+Per-request timing and query counting.
+
+RequestTimingMiddleware times a sample of the requests (one in
+REQUEST_TIMING_SAMPLE_RATE). For a sampled request it records:
+
+- total: Wall time spent in the middlewares after it and the view.
+- db: Time spent executing SQL, and the number of queries.
+- auth: Time spent authenticating the request, including its queries.
+- render: Time spent rendering the response body, including its queries.
+
+The timings are sent back in a Server-Timing header and logged as one JSON
+line on the `vendor_management_system.timing` logger. A query repeated
+REQUEST_TIMING_DUPLICATE_THRESHOLD times or more with the same SQL (only
+its parameters differing) is listed under `duplicates`, the usual sign of
+an N+1 pattern.
+
+Queries are timed by a wrapper every database connection gets when it is
+opened. The request being timed is held in a context variable, so queries
+run by async views in worker threads are counted too, and a request that
+is not sampled only costs a context variable lookup per query.
+"""
+import json
+import logging
+import random
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from rest_framework.renderers import JSONRenderer
+
+logger = logging.getLogger(__name__)
+
+_current_timing = ContextVar('request_timing', default=None)
+
+
+class RequestTiming:
+    """
+    The timings collected while handling one request.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.total = 0.0
+        self.db_time = 0.0
+        self.queries = Counter()
+        self.phases = {}
+
+    def add_query(self, sql, duration):
+        self.db_time += duration
+        self.queries[sql] += 1
+
+    def add_phase(self, name, duration):
+        self.phases[name] = self.phases.get(name, 0.0) + duration
+
+    def finish(self):
+        self.total = time.perf_counter() - self.started
+
+    def duplicates(self, threshold):
+        """
+        Returns the SQL run at least `threshold` times, most repeated first.
+        """
+        return [
+            {'sql': sql, 'count': count}
+            for sql, count in self.queries.most_common()
+            if count >= threshold
+        ]
+
+    def server_timing(self):
+        """
+        Returns the value of the Server-Timing header, durations in ms.
+        """
+        entries = [
+            f'total;dur={self.total * 1000:.2f}',
+            f'db;dur={self.db_time * 1000:.2f};'
+            f'desc="{sum(self.queries.values())} queries"'
+        ]
+        entries += [
+            f'{name};dur={duration * 1000:.2f}'
+            for name, duration in self.phases.items()
+        ]
+        return ', '.join(entries)
+
+    def log_record(self, request, response, threshold):
+        """
+        Returns the structured log line of the request.
+        """
+        return {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': round(self.total * 1000, 3),
+            'db_ms': round(self.db_time * 1000, 3),
+            'queries': sum(self.queries.values()),
+            **{
+                f'{name}_ms': round(duration * 1000, 3)
+                for name, duration in self.phases.items()
+            },
+            'duplicates': self.duplicates(threshold)
+        }
+
+
+@contextmanager
+def timed_phase(name):
+    """
+    Time a phase of the current request, when it is being timed.
+    """
+    timing = _current_timing.get()
+    if timing is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.add_phase(name, time.perf_counter() - started)
+
+
+def time_query(execute, sql, params, many, context):
+    """
+    Database execute wrapper recording the query in the timed request.
+    """
+    timing = _current_timing.get()
+    if timing is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timing.add_query(sql, time.perf_counter() - started)
+
+
+def install_query_timer(connection, **kwargs):
+    """
+    Add the query timer to a database connection. It goes first, so that
+    wrappers pushed and popped around it by execute_wrapper() leave it in
+    place.
+    """
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, time_query)
+
+
+connection_created.connect(install_query_timer)
+
+
+class RequestTimingMiddleware:
+    """
+    Time a sample of the requests, see the module documentation.
+
+    Works under both WSGI and ASGI, without moving async views to a thread.
+    The time spent streaming a streaming response is not included.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def sampled(self):
+        rate = getattr(settings, 'REQUEST_TIMING_SAMPLE_RATE', 0.0)
+        return rate > 0 and random.random() < rate
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+        # Connections opened before this module was loaded.
+        for connection in connections.all(initialized_only=True):
+            install_query_timer(connection)
+        timing = RequestTiming()
+        token = _current_timing.set(timing)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_timing.reset(token)
+        return self.report(request, response, timing)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+        timing = RequestTiming()
+        token = _current_timing.set(timing)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_timing.reset(token)
+        return self.report(request, response, timing)
+
+    def report(self, request, response, timing):
+        timing.finish()
+        threshold = getattr(settings, 'REQUEST_TIMING_DUPLICATE_THRESHOLD', 5)
+        response['Server-Timing'] = timing.server_timing()
+        logger.info(
+            json.dumps(timing.log_record(request, response, threshold))
+        )
+        return response
+
+
+class TimedJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer recording its time as the render phase of the request.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with timed_phase('render'):
+            return super().render(data, accepted_media_type, renderer_context)